@@ -1,4 +1,6 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
+from aws_config import SHARED_CONFIG
 import json
 import time
 import os
@@ -10,15 +12,21 @@ import re
 # Specify your AWS region (e.g., us-east-1)
 REGION = 'us-east-1'  # ← Change to your preferred region
 # Initialize AWS clients
-textract = boto3.client('textract', region_name='us-east-1')
-bedrock = boto3.client('bedrock-runtime', region_name=REGION)
-s3 = boto3.client('s3', region_name=REGION)
+textract = boto3.client('textract', region_name='us-east-1', config=SHARED_CONFIG)
+bedrock = boto3.client('bedrock-runtime', region_name=REGION, config=SHARED_CONFIG)
+s3 = boto3.client('s3', region_name=REGION, config=SHARED_CONFIG)
 # ========================
 # CONFIGURATION
 # ========================
 BUCKET_NAME = 'awsidpdocs'         # Replace with your S3 bucket
 DOCUMENT_KEY = 'sample2.pdf'           # Document in S3
 MODEL_ID = 'anthropic.claude-v2'      # or 'anthropic.claude-instant-v1'
+# Large PDFs are fetched as parallel 8 MB byte-range GETs
+S3_DOWNLOAD_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=8,
+)
 
 
 # ========================
@@ -151,8 +159,10 @@ def export_all_visual_objects(bucket, key, blocks, out_dir="artifacts"):
     """
     os.makedirs(out_dir, exist_ok=True)
 
-    # 1. Grab PDF bytes once
-    pdf_bytes = s3.get_object(Bucket=bucket, Key=key)['Body'].read()
+    # 1. Grab PDF bytes once (concurrent ranged GETs instead of one stream)
+    buf = BytesIO()
+    s3.download_fileobj(bucket, key, buf, Config=S3_DOWNLOAD_CONFIG)
+    pdf_bytes = buf.getvalue()
 
     # 2. Convert every page to 300-DPI images
     page_imgs = convert_from_bytes(pdf_bytes, dpi=300)
@@ -8,6 +8,7 @@ Minimalist UI to view all accounts with accordion layout - fetches data directly
 from flask import Flask, render_template, jsonify
 import json
 import boto3
+from aws_config import SHARED_CONFIG
 from collections import defaultdict
 
 app = Flask(__name__)
@@ -18,7 +19,7 @@ S3_PREFIX = "SplittedPdfs"
 AWS_REGION = 'us-east-1'
 
 # Initialize AWS client
-s3 = boto3.client('s3', region_name=AWS_REGION)
+s3 = boto3.client('s3', region_name=AWS_REGION, config=SHARED_CONFIG)
 
 @app.route('/')
 def index():
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+aws_config.py
+
+botocore client configuration shared by every script that talks to AWS.
+Modules with their own worker pools merge in a larger max_pool_connections:
+
+    boto3.client("s3", config=SHARED_CONFIG.merge(Config(max_pool_connections=N)))
+"""
+
+from botocore.config import Config
+
+# Adaptive retries back off on the throttling Textract/Bedrock/S3 return under
+# load; keep-alive lets concurrent calls reuse warm HTTPS connections.
+SHARED_CONFIG = Config(
+    retries={'mode': 'adaptive', 'max_attempts': 8},
+    max_pool_connections=50,
+    tcp_keepalive=True,
+)
+
+# process_textract_results handles this many files at once, and every worker
+# may call testingAWS/classifyAttachment; their clients size their pools from it
+MAX_FILE_WORKERS = 20
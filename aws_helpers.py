@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+aws_helpers.py
+
+Helpers shared by pipeline.py and testingAWS.py.
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson is noticeably faster on large Textract dumps; fall back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+POLL_MIN = 0.5  # first wait between Textract status polls (seconds)
+POLL_MAX = 10.0  # longest wait between polls
+POLL_FACTOR = 1.5  # backoff multiplier per poll
+
+PAGE_BREAK = "\f"  # separates pages in linearised OCR text
+
+def json_dumps_bytes(data, indent=True) -> bytes:
+    """Serialise *data* as JSON bytes (2-space indented unless indent=False)"""
+    if orjson:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None, default=str)
+    return json.dumps(data, indent=2 if indent else None, default=str).encode('utf-8')
+
+def json_loads(raw):
+    """Parse JSON from str or bytes"""
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch either
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def linearize_blocks(blocks):
+    """LINE text of Textract blocks (any iterable), with PAGE_BREAK between pages"""
+    lines, page = [], None
+    for block in blocks:
+        if block['BlockType'] != 'LINE':
+            continue
+        if page is not None and block.get('Page', 1) != page:
+            lines.append(PAGE_BREAK)
+        page = block.get('Page', 1)
+        lines.append(block['Text'])
+    return "\n".join(lines)
+
+def prefetch_textract_blocks(textract, job_id, first_page=None):
+    """Yield blocks from a Textract job on *textract*, fetching the next page while the current one is consumed
+
+    *first_page* is a SUCCEEDED get_document_analysis response the caller
+    already has; passing it avoids requesting the first page a second time.
+    """
+    def fetch(next_token=None):
+        if next_token:
+            return textract.get_document_analysis(JobId=job_id, NextToken=next_token)
+        return textract.get_document_analysis(JobId=job_id)
+
+    # NextToken chains, so at most one request is in flight ahead of the consumer
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        resp = first_page if first_page is not None else fetch()
+        while True:
+            next_token = resp.get('NextToken')
+            pending = prefetch.submit(fetch, next_token) if next_token else None
+            yield from resp['Blocks']
+            if pending is None:
+                break
+            resp = pending.result()
+
+def collect_stream_text(resp) -> str:
+    """Join the text deltas of an invoke_model_with_response_stream response"""
+    parts = []
+    for event in resp["body"]:
+        chunk = event.get("chunk")
+        if not chunk:
+            continue
+        payload = json_loads(chunk["bytes"])
+        if payload["type"] == "content_block_delta":
+            parts.append(payload["delta"].get("text", ""))
+    return "".join(parts)
+
+def claude_request_body(instructions: str, text: str, prompt_caching: bool = False,
+                        system: bool = False) -> bytes:
+    """Bedrock Messages body with the static *instructions* ahead of the OCR *text*
+
+    system=True sends the instructions as a system block and only the OCR text
+    in the user turn; otherwise both go in the user turn, instructions first.
+    """
+    instructions_block = {"type": "text", "text": instructions}
+    if prompt_caching:
+        instructions_block["cache_control"] = {"type": "ephemeral"}
+    content = [] if system else [instructions_block]
+    # Bedrock rejects empty text blocks and empty user turns
+    if text.strip():
+        content.append({"type": "text", "text": text})
+    elif not content:
+        content.append({"type": "text", "text": "(empty)"})
+    body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": 4000,
+        "temperature": 0,
+        "messages": [{"role": "user", "content": content}],
+    }
+    if system:
+        body["system"] = [instructions_block]
+    return json_dumps_bytes(body, indent=False)
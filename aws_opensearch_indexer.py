@@ -6,6 +6,7 @@ Step-by-step AWS OpenSearch integration for document indexing and search
 """
 
 import boto3
+from aws_config import SHARED_CONFIG
 import json
 import requests
 from requests_aws4auth import AWS4Auth
@@ -24,8 +25,8 @@ OPENSEARCH_CONFIG = {
 }
 
 # AWS clients
-opensearch_client = boto3.client('opensearch', region_name=OPENSEARCH_CONFIG['region'])
-s3 = boto3.client('s3', region_name=OPENSEARCH_CONFIG['region'])
+opensearch_client = boto3.client('opensearch', region_name=OPENSEARCH_CONFIG['region'], config=SHARED_CONFIG)
+s3 = boto3.client('s3', region_name=OPENSEARCH_CONFIG['region'], config=SHARED_CONFIG)
 
 # --------------------------------------------------
 # STEP 1: CREATE OPENSEARCH DOMAIN
@@ -10,6 +10,8 @@ import boto3
 import json
 import time
 import re
+from botocore.config import Config
+from aws_config import MAX_FILE_WORKERS, SHARED_CONFIG
 from botocore.exceptions import ClientError
 
 # -------------------------------------------------
@@ -23,8 +25,13 @@ CONFIG = dict(
     structured='structured_output4.json'
 )
 
-textract = boto3.client('textract', region_name=CONFIG['region'])
-bedrock = boto3.client('bedrock-runtime', region_name=CONFIG['region'])
+CLIENT_CONFIG = SHARED_CONFIG.merge(Config(max_pool_connections=MAX_FILE_WORKERS))
+
+textract = boto3.client('textract', region_name=CONFIG['region'], config=CLIENT_CONFIG)
+bedrock = boto3.client('bedrock-runtime', region_name=CONFIG['region'], config=CLIENT_CONFIG)
+
+_FENCE_PREFIX = re.compile(r'^```json\s*', re.I)
+_FENCE_SUFFIX = re.compile(r'```\s*$')
 
 # -------------------------------------------------
 def start_textract():
@@ -120,8 +127,7 @@ Example
     txt = claude['content'][0]['text'].strip()
 
     # Strip ```json ... ```
-    txt = re.sub(r'^```json\s*', '', txt, flags=re.I)
-    txt = re.sub(r'```\s*$', '', txt).strip()
+    txt = _FENCE_SUFFIX.sub('', _FENCE_PREFIX.sub('', txt)).strip()
 
     if not txt:
         raise RuntimeError('Claude returned empty text – nothing to parse')
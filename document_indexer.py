@@ -12,6 +12,7 @@ Comprehensive document indexing system that supports multiple search approaches:
 import json
 import sqlite3
 import boto3
+from aws_config import SHARED_CONFIG
 import numpy as np
 from pathlib import Path
 from datetime import datetime
@@ -50,7 +51,7 @@ INDEXING_CONFIG = {
 }
 
 # Initialize AWS client
-s3 = boto3.client('s3', region_name=INDEXING_CONFIG['aws_region'])
+s3 = boto3.client('s3', region_name=INDEXING_CONFIG['aws_region'], config=SHARED_CONFIG)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -298,8 +299,9 @@ class VectorIndexer:
             json.dump(self.embeddings_data, f, indent=2, default=str)
         logger.info(f"💾 Saved {len(self.embeddings_data)} embeddings")
     
-    def index_document(self, account_number: str, document_data: Dict, s3_key: str, pdf_type: str):
-        """Create embeddings for document"""
+    def index_document(self, account_number: str, document_data: Dict, s3_key: str, pdf_type: str,
+                       persist: bool = True):
+        """Create embeddings for document (pass persist=False to defer the file write)"""
         if not EMBEDDINGS_AVAILABLE:
             return
         
@@ -326,7 +328,8 @@ class VectorIndexer:
             
             # Add new record
             self.embeddings_data.append(embedding_record)
-            self.save_embeddings()
+            if persist:
+                self.save_embeddings()
             
             logger.info(f"🔍 Created embedding for {s3_key}")
             
@@ -521,13 +524,12 @@ class DocumentIndexer:
         """Index all documents from S3"""
         logger.info("📚 Starting S3 document indexing...")
         
+        indexed_count = 0
         try:
             # List all JSON files in S3
             paginator = s3.get_paginator('list_objects_v2')
             pages = paginator.paginate(Bucket=self.config['s3_bucket'], Prefix=self.config['s3_prefix'])
             
-            indexed_count = 0
-            
             for page in pages:
                 if 'Contents' not in page:
                     continue
@@ -539,7 +541,9 @@ class DocumentIndexer:
                     if (s3_key.endswith('_loan_indexed.json') or 
                         s3_key.endswith('_documents_classified.json')):
                         
-                        success = self.index_single_document(s3_key)
+                        # Defer the embeddings file write - rewriting the whole
+                        # JSON per document is O(N^2) over a full reindex
+                        success = self.index_single_document(s3_key, persist=False)
                         if success:
                             indexed_count += 1
             
@@ -547,8 +551,12 @@ class DocumentIndexer:
             
         except Exception as e:
             logger.error(f"❌ S3 indexing error: {e}")
+        finally:
+            # Persist whatever was indexed even if listing/indexing failed midway
+            if EMBEDDINGS_AVAILABLE and indexed_count:
+                self.vector_indexer.save_embeddings()
     
-    def index_single_document(self, s3_key: str) -> bool:
+    def index_single_document(self, s3_key: str, persist: bool = True) -> bool:
         """Index a single document from S3"""
         try:
             # Download document from S3
@@ -565,7 +573,7 @@ class DocumentIndexer:
             
             # Index in all systems
             self.sqlite_indexer.index_document(account_number, document_data, s3_key, pdf_type)
-            self.vector_indexer.index_document(account_number, document_data, s3_key, pdf_type)
+            self.vector_indexer.index_document(account_number, document_data, s3_key, pdf_type, persist=persist)
             self.es_indexer.index_document(account_number, document_data, s3_key, pdf_type)
             
             return True
@@ -17,9 +17,10 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pathlib import Path
-import subprocess
 import logging
 from datetime import datetime
+import pipeline
+import process_textract_results
 
 # --------------------------------------------------
 # EMAIL CONFIGURATION
@@ -198,26 +199,28 @@ class EmailProcessor:
                 shutil.copy2(pdf_file, target_pdf)
                 logger.info(f"📄 Copied {pdf_file} to {target_pdf}")
                 
-                # Run the pipeline
-                result = subprocess.run(['python', 'pipeline.py'], 
-                                      capture_output=True, text=True)
+                # Run the pipeline in-process - avoids interpreter startup and
+                # re-creating the boto3 clients for every attachment
+                try:
+                    uploaded_files = pipeline.main()
+                except (Exception, SystemExit) as e:
+                    logger.error(f"❌ Pipeline failed: {e}")
+                    return False
+                finally:
+                    # Don't leave the SQS poller running between emails
+                    if pipeline.textract_notifier:
+                        pipeline.textract_notifier.close()
+                logger.info("✅ Pipeline completed successfully")
                 
-                if result.returncode == 0:
-                    logger.info("✅ Pipeline completed successfully")
-                    
-                    # Run the textract results processing
-                    result2 = subprocess.run(['python', 'process_textract_results.py'], 
-                                           capture_output=True, text=True)
-                    
-                    if result2.returncode == 0:
-                        logger.info("✅ Textract results processing completed successfully")
-                        return True
-                    else:
-                        logger.error(f"❌ Textract processing failed: {result2.stderr}")
-                        return False
-                else:
-                    logger.error(f"❌ Pipeline failed: {result.stderr}")
+                # Run the textract results processing
+                try:
+                    # Only the accounts this PDF produced need listing
+                    process_textract_results.main(accounts=list(uploaded_files))
+                except (Exception, SystemExit) as e:
+                    logger.error(f"❌ Textract processing failed: {e}")
                     return False
+                logger.info("✅ Textract results processing completed successfully")
+                return True
             
             return True
             
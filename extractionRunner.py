@@ -16,6 +16,7 @@ from pathlib import Path
 from typing import Dict, Any
 
 import boto3
+from aws_config import SHARED_CONFIG
 from botocore.exceptions import ClientError
 
 # ------------------------------------------------ defaults
@@ -24,11 +25,14 @@ DEFAULT_MODEL  = "anthropic.claude-3-sonnet-20240229-v1:0"
 LOCAL_ROOT     = Path(__file__).with_name("output")
 LOCAL_ROOT.mkdir(exist_ok=True)
 
+_FENCE_PREFIX = re.compile(r"^```(?:json)?", re.I)
+_FENCE_SUFFIX = re.compile(r"```$")
+
 # ------------------------------------------------ clients
 def _clients(region: str):
     return (
-        boto3.client("textract", region_name=region),
-        boto3.client("bedrock-runtime", region_name=region),
+        boto3.client("textract", region_name=region, config=SHARED_CONFIG),
+        boto3.client("bedrock-runtime", region_name=region, config=SHARED_CONFIG),
     )
 
 
@@ -147,15 +151,14 @@ OCR text:
     model_text = resp_obj["content"][0]["text"]
 
     # remove ```json … ```
-    clean = re.sub(r"^```(?:json)?", "", model_text, flags=re.I)
-    clean = re.sub(r"```$", "", clean).strip()
+    clean = _FENCE_SUFFIX.sub("", _FENCE_PREFIX.sub("", model_text)).strip()
     return json.loads(clean)
 
 
 # ------------------------------------------------ upload helpers
 def _upload_and_mirror(bucket: str, account: str, file_name: str, file_path: Path):
     s3_key = f"{account}/textract/extraction/{file_name}"
-    s3 = boto3.client("s3")
+    s3 = boto3.client("s3", config=SHARED_CONFIG)
     s3.upload_file(str(file_path), bucket, s3_key)
     print(f"  ↑ s3://{bucket}/{s3_key}")
 
@@ -11,16 +11,19 @@ MongoDB-based document indexing with RAG capabilities:
 
 import json
 import boto3
+from aws_config import SHARED_CONFIG
 import logging
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 import hashlib
 import re
+import threading
 
 # MongoDB and vector search imports
 try:
     from pymongo import MongoClient
-    from pymongo.errors import ConnectionFailure, DuplicateKeyError
+    from pymongo.server_api import ServerApi
+    from pymongo.errors import ConnectionFailure, DuplicateKeyError, OperationFailure
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
@@ -52,12 +55,73 @@ MONGODB_CONFIG = {
     'vector_dimension': 384  # Dimension for all-MiniLM-L6-v2
 }
 
+TEXT_PREVIEW_CHARS = 250  # text_content returned with search results
+
+# Filter keys that identify a single account -> indexed field on documents
+UNIQUE_FILTER_FIELDS = {
+    'account_number': 'account_number',
+    'pan': 'content.account_info.pan',
+    'aadhaar': 'content.account_info.aadhaar',
+}
+
+# UI filter keys -> indexed field on documents, matched by anchored prefix
+FILTER_FIELDS = dict(UNIQUE_FILTER_FIELDS,
+                     document_type='document_type',
+                     customer_name='content.account_info.customer_name',
+                     customer_id='content.account_info.customer_id')
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize AWS client
-s3 = boto3.client('s3', region_name=MONGODB_CONFIG['aws_region'])
+s3 = boto3.client('s3', region_name=MONGODB_CONFIG['aws_region'], config=SHARED_CONFIG)
+
+# --------------------------------------------------
+# SHARED RESOURCES
+# --------------------------------------------------
+# lru_cache doesn't lock on a miss, so concurrent first requests (threaded
+# Flask/gunicorn) would each build a client/model/indexer. Creation is
+# double-checked under one re-entrant lock instead; get_indexer() builds the
+# client and model while holding it.
+_shared_lock = threading.RLock()
+_mongo_clients = {}       # connection string -> MongoClient
+_embedding_models = {}    # model name -> SentenceTransformer
+_indexer = None
+
+def get_mongo_client(connection_string: str = MONGODB_CONFIG['connection_string']):
+    """Create one pooled MongoClient per connection string and share it across callers"""
+    client = _mongo_clients.get(connection_string)
+    if client is None:
+        with _shared_lock:
+            client = _mongo_clients.get(connection_string)
+            if client is None:
+                client = _mongo_clients[connection_string] = _create_mongo_client(connection_string)
+    return client
+
+def _create_mongo_client(connection_string: str):
+    return MongoClient(
+        connection_string,
+        server_api=ServerApi('1'),
+        maxPoolSize=20,
+        minPoolSize=2,
+        retryWrites=True,
+        serverSelectionTimeoutMS=5000,  # 5 second timeout
+        connectTimeoutMS=10000,         # 10 second connection timeout
+        socketTimeoutMS=20000           # 20 second socket timeout
+    )
+
+def load_embedding_model(model_name: str):
+    """Load a sentence-transformers model once per process and reuse it"""
+    model = _embedding_models.get(model_name)
+    if model is None:
+        with _shared_lock:
+            model = _embedding_models.get(model_name)
+            if model is None:
+                model = SentenceTransformer(model_name, device="cpu")
+                model.eval()
+                _embedding_models[model_name] = model
+    return model
 
 # --------------------------------------------------
 # MONGODB RAG INDEXER
@@ -65,9 +129,9 @@ s3 = boto3.client('s3', region_name=MONGODB_CONFIG['aws_region'])
 class MongoDBRAGIndexer:
     """MongoDB-based indexer with RAG capabilities"""
     
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, client=None):
         self.config = config
-        self.client = None
+        self.client = client
         self.db = None
         self.embedding_model = None
         
@@ -83,12 +147,8 @@ class MongoDBRAGIndexer:
             return False
         
         try:
-            self.client = MongoClient(
-                self.config['connection_string'],
-                serverSelectionTimeoutMS=5000,  # 5 second timeout
-                connectTimeoutMS=10000,         # 10 second connection timeout
-                socketTimeoutMS=20000           # 20 second socket timeout
-            )
+            if self.client is None:
+                self.client = get_mongo_client(self.config['connection_string'])
             
             # Test the connection
             self.client.admin.command('ping')
@@ -111,7 +171,7 @@ class MongoDBRAGIndexer:
             return
         
         try:
-            self.embedding_model = SentenceTransformer(self.config['embedding_model'])
+            self.embedding_model = load_embedding_model(self.config['embedding_model'])
             logger.info(f"✅ Loaded embedding model: {self.config['embedding_model']}")
         except Exception as e:
             logger.error(f"❌ Failed to load embedding model: {e}")
@@ -138,6 +198,17 @@ class MongoDBRAGIndexer:
             documents_col.create_index("account_number", unique=True)  # One document per account
             documents_col.create_index("document_type")
             documents_col.create_index("created_at")
+            # Customer fields matched by the FILTER_FIELDS prefix filters
+            for field in ("customer_name", "pan", "aadhaar", "customer_id"):
+                documents_col.create_index(f"content.account_info.{field}")
+            try:
+                documents_col.create_index(
+                    [("text_content", "text"), ("account_number", "text")],
+                    name="documents_text"
+                )
+            except Exception as e:
+                # e.g. an existing text index with other fields; search falls back to regex
+                logger.warning(f"⚠️ Could not create text index: {e}")
             
             # Embeddings collection indexes
             embeddings_col = self.db[collections['embeddings']]
@@ -464,59 +535,55 @@ class MongoDBRAGIndexer:
         
         try:
             documents_col = self.db[self.config['collections']['documents']]
-            accounts_col = self.db[self.config['collections']['accounts']]
             
-            # Build MongoDB query - search across all fields without prefilled keys
-            mongo_query = {}
+            # Build filter conditions shared by both search strategies
+            filter_query = self._filter_query(filters)
             
-            # Case-insensitive text search across all relevant fields
+            results = []
+            
+            # Whole-word matches go through the text index, ranked by relevance.
+            # $text ORs bare terms, so search the query as one phrase to keep
+            # the substring semantics of the regex search below
             if query:
-                search_fields = [
-                    {'text_content': {'$regex': query, '$options': 'i'}},
-                    {'account_number': {'$regex': query, '$options': 'i'}},
-                    # Search in nested content fields
-                    {'content.account_info.customer_name': {'$regex': query, '$options': 'i'}},
-                    {'content.account_info.pan': {'$regex': query, '$options': 'i'}},
-                    {'content.account_info.aadhaar': {'$regex': query, '$options': 'i'}},
-                    {'content.account_info.customer_id': {'$regex': query, '$options': 'i'}},
-                    # Search in signers
-                    {'content.signers.SignerName': {'$regex': query, '$options': 'i'}},
-                    {'content.signers.SSN': {'$regex': query, '$options': 'i'}},
-                    {'content.signers.Address': {'$regex': query, '$options': 'i'}},
-                    {'content.signers.Employer': {'$regex': query, '$options': 'i'}},
-                    # Search in attachments
-                    {'content.attachments.documentType': {'$regex': query, '$options': 'i'}},
-                    {'content.attachments.firstName': {'$regex': query, '$options': 'i'}},
-                    {'content.attachments.lastName': {'$regex': query, '$options': 'i'}},
-                    {'content.attachments.licenseNumber': {'$regex': query, '$options': 'i'}},
-                    # Search in account types and purposes
-                    {'content.account_info.account_types': {'$regex': query, '$options': 'i'}},
-                    {'content.account_info.account_purposes': {'$regex': query, '$options': 'i'}}
-                ]
+                phrase = '"%s"' % query.replace('"', ' ')
+                text_query = dict(filter_query, **{'$text': {'$search': phrase}})
+                try:
+                    results = self._run_search_pipeline(documents_col, text_query, limit, text_score=True)
+                except OperationFailure as e:
+                    logger.warning(f"⚠️ Text index search unavailable, using regex search: {e}")
+            
+            # Fall back to regex for partial matches (e.g. part of an account number)
+            if not results:
+                mongo_query = dict(filter_query)
                 
-                mongo_query['$or'] = search_fields
-            
-            # Apply additional filters if provided
-            if filters:
-                for key, value in filters.items():
-                    if key == 'account_number':
-                        mongo_query['account_number'] = {'$regex': value, '$options': 'i'}
-                    elif key == 'document_type':
-                        mongo_query['document_type'] = {'$regex': value, '$options': 'i'}
-                    else:
-                        # Generic filter for any field
-                        mongo_query[key] = {'$regex': str(value), '$options': 'i'}
-            
-            # Execute search
-            results = list(documents_col.find(mongo_query).limit(limit))
-            
-            # Convert ObjectId to string and format dates
-            for result in results:
-                result['_id'] = str(result['_id'])
-                if 'created_at' in result:
-                    result['created_at'] = result['created_at'].isoformat()
-                if 'last_modified' in result:
-                    result['last_modified'] = result['last_modified'].isoformat()
+                # Case-insensitive text search across all relevant fields
+                if query:
+                    search_fields = [
+                        {'text_content': {'$regex': query, '$options': 'i'}},
+                        {'account_number': {'$regex': query, '$options': 'i'}},
+                        # Search in nested content fields
+                        {'content.account_info.customer_name': {'$regex': query, '$options': 'i'}},
+                        {'content.account_info.pan': {'$regex': query, '$options': 'i'}},
+                        {'content.account_info.aadhaar': {'$regex': query, '$options': 'i'}},
+                        {'content.account_info.customer_id': {'$regex': query, '$options': 'i'}},
+                        # Search in signers
+                        {'content.signers.SignerName': {'$regex': query, '$options': 'i'}},
+                        {'content.signers.SSN': {'$regex': query, '$options': 'i'}},
+                        {'content.signers.Address': {'$regex': query, '$options': 'i'}},
+                        {'content.signers.Employer': {'$regex': query, '$options': 'i'}},
+                        # Search in attachments
+                        {'content.attachments.documentType': {'$regex': query, '$options': 'i'}},
+                        {'content.attachments.firstName': {'$regex': query, '$options': 'i'}},
+                        {'content.attachments.lastName': {'$regex': query, '$options': 'i'}},
+                        {'content.attachments.licenseNumber': {'$regex': query, '$options': 'i'}},
+                        # Search in account types and purposes
+                        {'content.account_info.account_types': {'$regex': query, '$options': 'i'}},
+                        {'content.account_info.account_purposes': {'$regex': query, '$options': 'i'}}
+                    ]
+                    
+                    mongo_query['$or'] = search_fields
+                
+                results = self._run_search_pipeline(documents_col, mongo_query, limit)
             
             logger.info(f"🔍 Found {len(results)} documents for query: '{query}'")
             return results
@@ -525,25 +592,106 @@ class MongoDBRAGIndexer:
             logger.error(f"❌ Search error: {e}")
             return []
     
-    def semantic_search(self, query: str, limit: int = 10, similarity_threshold: float = 0.3) -> List[Dict]:
+    def _run_search_pipeline(self, collection, match: Dict, limit: int, text_score: bool = False) -> List[Dict]:
+        """Run a search as one aggregation so sorting, limiting and ObjectId/date conversion happen server-side"""
+        pipeline = [{'$match': match}]
+        if text_score:
+            pipeline.append({'$sort': {'score': {'$meta': 'textScore'}}})
+        pipeline.append({'$limit': limit})
+        pipeline.append({'$addFields': {
+            '_id': {'$toString': '$_id'},
+            # Results only show a preview; the full text can be very large
+            'text_content': {'$substrCP': ['$text_content', 0, TEXT_PREVIEW_CHARS]},
+            'created_at': {'$dateToString': {'date': '$created_at'}},
+            'last_modified': {'$dateToString': {'date': '$last_modified'}}
+        }})
+        return list(collection.aggregate(pipeline, batchSize=limit))
+    
+    def semantic_search(self, query: str, limit: int = 10, similarity_threshold: float = 0.3,
+                        filters: Dict = None) -> List[Dict]:
         """Perform semantic search using vector embeddings with prompt support"""
+        # A filter on a unique key already pins the account; skip the embeddings
+        direct = self.find_by_unique_filters(filters, limit)
+        if direct is not None:
+            return direct
+        
         if not self.embedding_model or self.db is None:
             logger.warning("⚠️ Semantic search not available")
             return []
         
         try:
-            # Enhanced query processing for prompts
-            processed_query = self._process_search_prompt(query)
-            logger.info(f"🔍 Processing semantic search: '{query}' -> '{processed_query}'")
-            
-            # Generate query embedding
-            query_embedding = self.embedding_model.encode(processed_query)
-            
+            query_embedding = self.embed_query(query)
+        except Exception as e:
+            logger.error(f"❌ Semantic search error: {e}")
+            return []
+        
+        return self.semantic_search_with_embedding(query_embedding, limit, similarity_threshold)
+    
+    @staticmethod
+    def _filter_query(filters: Optional[Dict]) -> Dict:
+        """Match conditions for UI *filters*
+
+        Keys in FILTER_FIELDS become anchored prefix matches on their indexed
+        field (one case-sensitive regex per usual casing, so the index bounds
+        still apply); any other key is a case-insensitive regex on that field.
+        """
+        query = {}
+        for key, value in (filters or {}).items():
+            value = str(value).strip()
+            if key in FILTER_FIELDS:
+                casings = {value, value.upper(), value.lower(), value.title()}
+                query[FILTER_FIELDS[key]] = {'$in': [re.compile('^' + re.escape(v)) for v in casings]}
+            else:
+                query[key] = {'$regex': value, '$options': 'i'}
+        return query
+    
+    def find_by_unique_filters(self, filters: Dict, limit: int = 10) -> Optional[List[Dict]]:
+        """Indexed lookup when *filters* include a unique key
+
+        Returns None when they don't, when nothing matches exactly (e.g. a
+        partial account number) or on error, so callers fall back to the
+        regular search.
+        """
+        if self.db is None or not filters or not UNIQUE_FILTER_FIELDS.keys() & filters.keys():
+            return None
+        
+        match = self._filter_query({k: v for k, v in filters.items() if k not in UNIQUE_FILTER_FIELDS})
+        for key in UNIQUE_FILTER_FIELDS.keys() & filters.keys():
+            # Exact match stays on the index; cover the usual casings
+            value = str(filters[key]).strip()
+            match[UNIQUE_FILTER_FIELDS[key]] = {'$in': list({value, value.upper(), value.lower()})}
+        
+        try:
+            documents_col = self.db[self.config['collections']['documents']]
+            results = self._run_search_pipeline(documents_col, match, limit)
+        except Exception as e:
+            logger.error(f"❌ Direct lookup error: {e}")
+            return None
+        
+        logger.info(f"⚡ Direct lookup for {list(match)}: {len(results)} documents")
+        return results or None
+    
+    def embed_query(self, query: str):
+        """Expand a search prompt and encode it with the embedding model"""
+        # Enhanced query processing for prompts
+        processed_query = self._process_search_prompt(query)
+        logger.info(f"🔍 Processing semantic search: '{query}' -> '{processed_query}'")
+        
+        return self.embedding_model.encode(processed_query)
+    
+    def semantic_search_with_embedding(self, query_embedding, limit: int = 10,
+                                       similarity_threshold: float = 0.3) -> List[Dict]:
+        """Perform semantic search with an already computed query embedding"""
+        if self.db is None:
+            logger.warning("⚠️ Semantic search not available")
+            return []
+        
+        try:
             # Get all embeddings
             embeddings_col = self.db[self.config['collections']['embeddings']]
             documents_col = self.db[self.config['collections']['documents']]
             
-            all_embeddings = list(embeddings_col.find({}))
+            all_embeddings = list(embeddings_col.find({}, {'_id': 0, 'document_id': 1, 'embedding': 1}))
             
             if not all_embeddings:
                 logger.warning("⚠️ No embeddings found in database")
@@ -573,17 +721,19 @@ class MongoDBRAGIndexer:
                 filtered_similarities = similarities[:limit]
                 logger.info(f"📊 No results above threshold {similarity_threshold}, showing top {len(filtered_similarities)} results")
             
-            # Get corresponding documents
+            # Get corresponding documents in one query, sized to the result page
+            top_matches = filtered_similarities[:limit]
+            docs_by_id = {}
+            if top_matches:
+                doc_ids = [doc_id for _, doc_id in top_matches]
+                hits = self._run_search_pipeline(documents_col, {'_id': {'$in': doc_ids}}, len(doc_ids))
+                docs_by_id = {doc['_id']: doc for doc in hits}
+            
             results = []
-            for similarity, doc_id in filtered_similarities[:limit]:
-                doc = documents_col.find_one({'_id': doc_id})
+            for similarity, doc_id in top_matches:
+                doc = docs_by_id.get(str(doc_id))
                 if doc:
-                    doc['_id'] = str(doc['_id'])
                     doc['similarity_score'] = float(similarity)
-                    if 'created_at' in doc:
-                        doc['created_at'] = doc['created_at'].isoformat()
-                    if 'last_modified' in doc:
-                        doc['last_modified'] = doc['last_modified'].isoformat()
                     results.append(doc)
             
             logger.info(f"🎯 Found {len(results)} semantically similar documents (threshold: {similarity_threshold})")
@@ -665,15 +815,27 @@ class MongoDBRAGIndexer:
         try:
             collections = self.config['collections']
             
-            # Get account info
-            account = self.db[collections['accounts']].find_one(
-                {'account_number': account_number}
-            )
-            
-            # Get all documents for this account
-            documents = list(self.db[collections['documents']].find(
-                {'account_number': account_number}
-            ))
+            # Account info and its documents in one round trip
+            matches = list(self.db[collections['accounts']].aggregate([
+                {'$match': {'account_number': account_number}},
+                {'$limit': 1},
+                {'$lookup': {
+                    'from': collections['documents'],
+                    'localField': 'account_number',
+                    'foreignField': 'account_number',
+                    'as': 'documents'
+                }}
+            ]))
+            
+            if matches:
+                account = matches[0]
+                documents = account.pop('documents')
+            else:
+                # Documents can exist without an account record
+                account = None
+                documents = list(self.db[collections['documents']].find(
+                    {'account_number': account_number}
+                ))
             
             # Convert ObjectIds to strings
             if account:
@@ -714,6 +876,15 @@ class MongoDBRAGIndexer:
         
         logger.info("✅ S3 to MongoDB indexing completed!")
 
+def get_indexer() -> MongoDBRAGIndexer:
+    """Return the process-wide indexer for MONGODB_CONFIG"""
+    global _indexer
+    if _indexer is None:
+        with _shared_lock:
+            if _indexer is None:
+                _indexer = MongoDBRAGIndexer(MONGODB_CONFIG)
+    return _indexer
+
 # --------------------------------------------------
 # SEARCH API
 # --------------------------------------------------
@@ -723,13 +894,13 @@ def create_mongodb_search_api():
         from flask import Flask, request, jsonify
         
         app = Flask(__name__)
-        indexer = MongoDBRAGIndexer(MONGODB_CONFIG)
+        indexer = get_indexer()
         
         @app.route('/search', methods=['GET'])
         def search():
             query = request.args.get('q', '')
             search_type = request.args.get('type', 'traditional')  # traditional or semantic
-            limit = int(request.args.get('limit', 10))
+            limit = max(1, min(request.args.get('limit', 10, type=int), 100))
             
             # No prefilled filters - let users search freely
             filters = {}
@@ -751,10 +922,21 @@ def create_mongodb_search_api():
             summary = indexer.get_account_summary(account_number)
             return jsonify(summary)
         
+        # Reindexing runs in the background so it doesn't tie up a request thread
+        reindex_lock = threading.Lock()
+        
+        def _reindex_worker():
+            try:
+                indexer.index_s3_documents()
+            finally:
+                reindex_lock.release()
+        
         @app.route('/reindex', methods=['POST'])
         def reindex():
-            indexer.index_s3_documents()
-            return jsonify({"status": "success", "message": "Reindexing completed"})
+            if not reindex_lock.acquire(blocking=False):
+                return jsonify({"status": "running", "message": "Reindexing already in progress"}), 409
+            threading.Thread(target=_reindex_worker, daemon=True).start()
+            return jsonify({"status": "accepted", "message": "Reindexing started"}), 202
         
         @app.route('/health', methods=['GET'])
         def health():
@@ -777,7 +959,7 @@ def main():
     """Main execution function"""
     import sys
     
-    indexer = MongoDBRAGIndexer(MONGODB_CONFIG)
+    indexer = get_indexer()
     
     if len(sys.argv) > 1:
         command = sys.argv[1]
@@ -809,7 +991,7 @@ def main():
             app = create_mongodb_search_api()
             if app:
                 print("🚀 Starting MongoDB search API on http://localhost:5000")
-                app.run(debug=True)
+                app.run(debug=True, threaded=True)
         else:
             print("Usage: python mongodb_rag_indexer.py [index|search|semantic|account|api]")
     else:
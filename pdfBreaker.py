@@ -1,16 +1,19 @@
 import re
 import boto3
+from aws_config import SHARED_CONFIG
 import sys
 from io import BytesIO
 from pathlib import Path
+from typing import Optional
 import pypdfium2 as pdfium
 import json
 
-textract = boto3.client("textract")
+textract = boto3.client("textract", config=SHARED_CONFIG)
 
 ACCOUNT_LABELS = {
     "account number", "account no", "account #", "acct number", "acct no", "acct #"
 }
+_ACCT_NUM_RE = re.compile(r"(?i)account\s*(?:#|no|number)\s*[:.-]?\s*(\d{6,20})")
 
 def _normalise_key(text: str) -> str:
     """'Account  Number :' -> 'accountnumber'"""
@@ -40,11 +43,11 @@ def _get_kv_map(blocks):
                 kv[_normalise_key(key_text)] = val_text
     return kv
 
-def find_account_numbers(image_bytes: bytes):
+def find_account_numbers(image_bytes: bytes) -> Optional[str]:
     """
     1. Try Textract FORMS first (handles multi-line key/value).
     2. Fallback to plain regex on raw text.
-    Returns set of unique account numbers.
+    Returns the first account number found on the page, or None.
     """
     # --- 1. FORMS call ---
     resp = textract.analyze_document(
@@ -53,23 +56,21 @@ def find_account_numbers(image_bytes: bytes):
     )
     kv = _get_kv_map(resp["Blocks"])
 
-    accounts = set()
     for k, v in kv.items():
         if any(label in k for label in ACCOUNT_LABELS):
             # keep only digits
             digits = re.sub(r"\D", "", v)
             if 6 <= len(digits) <= 20:
-                accounts.add(digits)
+                return digits
 
-    # --- 2. Fallback regex on raw text ---
-    if not accounts:
-        raw_text = " ".join(
-            b["Text"] for b in resp["Blocks"]
-            if b["BlockType"] == "LINE"
-        )
-        accounts = set(re.findall(r"(?i)account\s*(?:#|no|number)\s*[:.-]?\s*(\d{6,20})", raw_text))
+    # --- 2. Fallback regex on raw text, one LINE at a time ---
+    for b in resp["Blocks"]:
+        if b["BlockType"] == "LINE":
+            m = _ACCT_NUM_RE.search(b["Text"])
+            if m:
+                return m.group(1)
 
-    return accounts
+    return None
 
 # ------------------------------------------------------------------
 # 1.  Re-usable helper – returns the final dict, no I/O
@@ -104,7 +105,7 @@ def build_account_json(pdf_path: Path) -> dict:
         return f"{min(pages)}-{max(pages)}" if len(pages) > 1 else str(pages[0])
 
     # ---- main loop ----
-    pdf = pdfium.PdfDocument(pdf_path.read_bytes())
+    pdf = pdfium.PdfDocument(str(pdf_path))     # pdfium reads pages from disk on demand
     out = {}                      # final result
     current_acct = None           # account number in force
     extraction_pages = []         # pages where we *saw* the account number
@@ -112,10 +113,10 @@ def build_account_json(pdf_path: Path) -> dict:
 
     for idx, page in enumerate(pdf, start=1):
         png_bytes = _png_from_page(page)
-        accounts_on_page = find_account_numbers(png_bytes)
+        acct = find_account_numbers(png_bytes)
 
         # ---- 1. new account detected ----
-        if accounts_on_page and accounts_on_page != {current_acct}:
+        if acct and acct != current_acct:
             # flush previous account block
             if current_acct is not None:
                 out[current_acct] = {
@@ -123,14 +124,14 @@ def build_account_json(pdf_path: Path) -> dict:
                     "attachments": _range_str(attachment_pages)
                 }
             # start new account
-            current_acct = accounts_on_page.pop()   # take first new number
+            current_acct = acct
             extraction_pages = [idx]
             attachment_pages = []
             print(f"New account {current_acct} starts at page {idx}")
 
         # ---- 2. same account continues ----
         elif current_acct is not None:
-            if accounts_on_page:                  # same number again
+            if acct:                              # same number again
                 extraction_pages.append(idx)
             else:                                 # no number → attachment
                 attachment_pages.append(idx)
@@ -197,7 +198,7 @@ if __name__ == "__main__":
         return f"{min(pages)}-{max(pages)}" if len(pages) > 1 else str(pages[0])
 
     # ---- main loop ----
-    pdf = pdfium.PdfDocument(file_path.read_bytes())
+    pdf = pdfium.PdfDocument(str(file_path))
     out = {}                      # final result
     current_acct = None           # account number in force
     extraction_pages = []         # pages where we *saw* the account number
@@ -205,10 +206,10 @@ if __name__ == "__main__":
 
     for idx, page in enumerate(pdf, start=1):
         png_bytes = _png_from_page(page)
-        accounts_on_page = find_account_numbers(png_bytes)
+        acct = find_account_numbers(png_bytes)
 
         # ---- 1. new account detected ----
-        if accounts_on_page and accounts_on_page != {current_acct}:
+        if acct and acct != current_acct:
             # flush previous account block
             if current_acct is not None:
                 out[current_acct] = {
@@ -216,14 +217,14 @@ if __name__ == "__main__":
                     "attachments": _range_str(attachment_pages)
                 }
             # start new account
-            current_acct = accounts_on_page.pop()   # take first new number
+            current_acct = acct
             extraction_pages = [idx]
             attachment_pages = []
             print(f"New account {current_acct} starts at page {idx}")
 
         # ---- 2. same account continues ----
         elif current_acct is not None:
-            if accounts_on_page:                  # same number again
+            if acct:                              # same number again
                 extraction_pages.append(idx)
             else:                                 # no number → attachment
                 attachment_pages.append(idx)
@@ -10,15 +10,26 @@ Complete pipeline that:
 5. Saves Textract results (.txt and .json) to S3 with distinguishable names
 """
 
-import tempfile
+import io
 import json
+import gzip
+import hashlib
+import functools
+import logging
+import os
 import time
-import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from pathlib import Path
 import pypdfium2 as pdfium
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from pdfBreaker import build_account_json
+from aws_config import SHARED_CONFIG
+from aws_helpers import (POLL_FACTOR, POLL_MAX, POLL_MIN, claude_request_body, collect_stream_text,
+                         json_dumps_bytes, json_loads, linearize_blocks, prefetch_textract_blocks)
 
 # --------------------------------------------------
 # CONFIGURATION
@@ -26,98 +37,256 @@ from pdfBreaker import build_account_json
 PDF_FILE = Path("./combinedPdf.pdf")
 S3_BUCKET = "awsidpdocs"
 S3_PREFIX = "SplittedPdfs"
+MANIFEST_KEY = f"{S3_PREFIX}/_manifest.json"  # {source PDF sha256: uploaded_files}
 AWS_REGION = 'us-east-1'
 BEDROCK_MODEL = 'anthropic.claude-3-sonnet-20240229-v1:0'
+BEDROCK_PROMPT_CACHING = False  # enable for models that support prompt caching on Bedrock
 AWS_PROFILE = None
+MAX_CONCURRENT_JOBS = 8  # Textract/Claude jobs in flight at once
+MAX_UPLOAD_WORKERS = 32  # parallel S3 PUTs for the split PDFs
+SAVE_RAW_TEXTRACT = True  # set False to skip *_textract_raw.json and keep only LINE blocks
+
+# Optional Textract completion notifications (SNS topic -> SQS queue).
+# Leave as None to fall back to polling get_document_analysis.
+TEXTRACT_SNS_TOPIC_ARN = None
+TEXTRACT_SNS_ROLE_ARN = None
+TEXTRACT_SQS_QUEUE_URL = None
+TEXTRACT_NOTIFY_TIMEOUT = 600  # seconds to wait for a notification before polling instead
+
+logger = logging.getLogger(__name__)
 
 # Initialize AWS clients
 if AWS_PROFILE:
     boto3.setup_default_session(profile_name=AWS_PROFILE)
 
-s3 = boto3.client("s3")
-textract = boto3.client('textract', region_name=AWS_REGION)
-bedrock = boto3.client('bedrock-runtime', region_name=AWS_REGION)
+# Each client's connection pool is sized to the worker pool sharing it, so
+# concurrent calls reuse warm HTTPS connections instead of opening new ones
+s3 = boto3.client("s3", config=SHARED_CONFIG.merge(Config(max_pool_connections=MAX_UPLOAD_WORKERS)))
+textract = boto3.client('textract', region_name=AWS_REGION,
+                        config=SHARED_CONFIG.merge(Config(max_pool_connections=MAX_CONCURRENT_JOBS)))
+bedrock = boto3.client('bedrock-runtime', region_name=AWS_REGION,
+                       config=SHARED_CONFIG.merge(Config(max_pool_connections=MAX_CONCURRENT_JOBS)))
+sqs = boto3.client('sqs', region_name=AWS_REGION, config=SHARED_CONFIG)
 
 # --------------------------------------------------
 # UTILITY FUNCTIONS FROM EXISTING FILES
 # --------------------------------------------------
 def parse_range(rng: str):
-    """Parse page range string like '1-5' or '7'"""
+    """Parse page range string like '1-5' or '7' into a range of page numbers"""
     if not rng:
-        return []
+        return range(0)
     parts = rng.split("-")
     if len(parts) == 1:
-        return [int(parts[0])]
-    return list(range(int(parts[0]), int(parts[1]) + 1))
+        return range(int(parts[0]), int(parts[0]) + 1)
+    return range(int(parts[0]), int(parts[1]) + 1)
 
-def build_pdf(pdf_doc, page_nums, output_path):
-    """Build a new PDF that contains *page_nums* (1-based) from *pdf_doc*."""
-    page_nums = sorted(set(page_nums))
+def build_pdf(pdf_doc, page_nums, sort=True) -> bytes:
+    """Return a new PDF (as bytes) that contains *page_nums* (1-based) from *pdf_doc*."""
+    if sort:
+        page_nums = sorted(set(page_nums))
     dest_pdf = pdfium.PdfDocument.new()
     dest_pdf.import_pages(pdf_doc, pages=[p - 1 for p in page_nums])
-    dest_pdf.save(output_path)
-
-def upload_file(file_path, bucket, key):
-    """Upload file to S3"""
-    s3.upload_file(str(file_path), bucket, key)
-    print(f" Uploaded  ->  s3://{bucket}/{key}")
+    buf = io.BytesIO()
+    dest_pdf.save(buf)
+    return buf.getvalue()
+
+@functools.lru_cache(maxsize=1)
+def _load_pdf(pdf_path: str):
+    """Parse the source PDF once per process and reuse it for every split"""
+    return pdfium.PdfDocument(pdf_path)  # opened by path so pdfium loads pages on demand
+
+def _build_combined_pdf_job(pdf_path, extraction_pages, attachment_pages):
+    """Process-pool worker: an account's extraction pages followed by its attachment pages"""
+    pages = sorted(set(extraction_pages)) + sorted(set(attachment_pages))
+    return build_pdf(_load_pdf(pdf_path), pages, sort=False)
+
+def upload_file(body, bucket, key):
+    """Upload in-memory file contents to S3"""
+    s3.put_object(Bucket=bucket, Key=key, Body=body)
+    logger.info(f"Uploaded  ->  s3://{bucket}/{key}")
+
+def load_manifest():
+    """Return the upload manifest from S3, or {} if there isn't one yet"""
+    try:
+        resp = s3.get_object(Bucket=S3_BUCKET, Key=MANIFEST_KEY)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return {}
+        raise
+    return json_loads(resp['Body'].read())
 
 # --------------------------------------------------
 # TEXTRACT PROCESSING FUNCTIONS
 # --------------------------------------------------
+def _notifications_enabled():
+    return bool(TEXTRACT_SNS_TOPIC_ARN and TEXTRACT_SNS_ROLE_ARN and TEXTRACT_SQS_QUEUE_URL)
+
+class TextractNotifier:
+    """
+    One SQS long-poller shared by every waiting job.
+    Completion messages are routed to the waiting thread by JobId, so the
+    queue should be dedicated to this pipeline. The poller only runs while
+    some job is expected and stops once none are left.
+    """
+
+    def __init__(self, queue_url):
+        self.queue_url = queue_url
+        self._lock = threading.Lock()
+        self._waiters = {}      # JobId -> Future, from expect() until wait() collects it
+        self._thread = None
+        self._stop = None       # Event for the current poller thread
+
+    def expect(self, job_id):
+        """Register *job_id* right after starting it, so an early notification isn't dropped"""
+        with self._lock:
+            future = self._waiters.setdefault(job_id, Future())
+            if self._thread is None or not self._thread.is_alive():
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._poll, args=(self._stop,), daemon=True)
+                self._thread.start()
+        return future
+
+    def wait(self, job_id, timeout=None):
+        """Block until Textract reports *job_id* finished; returns its status, or None on timeout"""
+        future = self.expect(job_id)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            return None
+        finally:
+            with self._lock:
+                self._waiters.pop(job_id, None)
+
+    def close(self):
+        """Stop the poller; jobs still waiting get None and fall back to polling"""
+        with self._lock:
+            thread, stop = self._thread, self._stop
+            self._thread = self._stop = None
+            for future in self._waiters.values():
+                if not future.done():
+                    future.set_result(None)
+            self._waiters = {}
+        if stop:
+            stop.set()
+        if thread:
+            thread.join()   # at most one receive_message long poll
+
+    def _poll(self, stop):
+        delay = POLL_MIN
+        while not stop.is_set():
+            try:
+                resp = sqs.receive_message(
+                    QueueUrl=self.queue_url,
+                    MaxNumberOfMessages=10,
+                    WaitTimeSeconds=20,
+                )
+            except Exception as e:
+                logger.error(f"❌ Could not read Textract notifications: {e}")
+                stop.wait(delay)
+                delay = min(delay * POLL_FACTOR, POLL_MAX)
+                continue
+            delay = POLL_MIN
+
+            for msg in resp.get('Messages', []):
+                try:
+                    self._handle(msg)
+                except Exception as e:
+                    # e.g. an SNS SubscriptionConfirmation; it will never parse, so drop it
+                    logger.warning(f"⚠️ Skipping unexpected notification {msg.get('MessageId')}: {e}")
+                try:
+                    sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=msg['ReceiptHandle'])
+                except Exception as e:
+                    logger.error(f"❌ Could not delete notification {msg.get('MessageId')}: {e}")
+
+            with self._lock:
+                pending = any(not future.done() for future in self._waiters.values())
+                if not pending and self._stop is stop:
+                    self._thread = self._stop = None
+                    return
+
+    def _handle(self, msg):
+        body = json.loads(msg['Body'])
+        # SNS wraps the Textract payload unless raw delivery is enabled
+        note = json.loads(body['Message']) if 'Message' in body else body
+        job_id, status = note.get('JobId'), note.get('Status')
+        if not job_id or not status:
+            raise ValueError("no JobId/Status in message")
+        with self._lock:
+            future = self._waiters.get(job_id)
+            # No waiter: a timed-out or foreign job - nobody will ever read it
+            if future and not future.done():
+                future.set_result(status)
+
+textract_notifier = TextractNotifier(TEXTRACT_SQS_QUEUE_URL) if _notifications_enabled() else None
+
 def start_textract_job(s3_key):
     """Start Textract job for a PDF in S3"""
     try:
+        kwargs = {}
+        if textract_notifier:
+            kwargs['NotificationChannel'] = {
+                'SNSTopicArn': TEXTRACT_SNS_TOPIC_ARN,
+                'RoleArn': TEXTRACT_SNS_ROLE_ARN,
+            }
         resp = textract.start_document_analysis(
             DocumentLocation={
                 'S3Object': {'Bucket': S3_BUCKET, 'Name': s3_key}
             },
             FeatureTypes=['FORMS', 'TABLES'],
+            **kwargs,
         )
         job_id = resp['JobId']
-        print(f"✅ Textract job started for {s3_key}: {job_id}")
+        if textract_notifier:
+            textract_notifier.expect(job_id)
+        logger.info(f"✅ Textract job started for {s3_key}: {job_id}")
         return job_id
     except ClientError as e:
-        print(f"❌ Could not start Textract for {s3_key}:", e)
+        logger.error(f"❌ Could not start Textract for {s3_key}: {e}")
         return None
 
 def wait_for_textract_job(job_id):
     """Wait for Textract job to complete"""
+    if textract_notifier:
+        status = textract_notifier.wait(job_id, timeout=TEXTRACT_NOTIFY_TIMEOUT)
+        if status is not None:
+            logger.info(f"✅ Textract job {job_id} {status}")
+            return textract.get_document_analysis(JobId=job_id) if status == 'SUCCEEDED' else None
+        logger.warning(f"⚠️ No notification for Textract job {job_id}, polling instead")
+
+    # Small documents finish in seconds, so start polling fast and back off
+    delay = POLL_MIN
     while True:
         resp = textract.get_document_analysis(JobId=job_id)
         status = resp['JobStatus']
         if status in ('SUCCEEDED', 'FAILED'):
-            print(f"✅ Textract job {status}")
+            logger.info(f"✅ Textract job {job_id} {status}")
             return resp if status == 'SUCCEEDED' else None
-        print("⏳ Waiting for Textract...")
-        time.sleep(5)
+        logger.debug(f"⏳ Waiting for Textract job {job_id}...")
+        time.sleep(delay)
+        delay = min(delay * POLL_FACTOR, POLL_MAX)
+
+def iter_textract_blocks(job_id, first_page=None):
+    """Yield blocks from a Textract job, fetching the next page while the current one is consumed
+
+    *first_page* is the SUCCEEDED response returned by wait_for_textract_job;
+    passing it avoids requesting the first page a second time.
+    """
+    return prefetch_textract_blocks(textract, job_id, first_page)
 
-def download_all_textract_blocks(job_id):
+def download_all_textract_blocks(job_id, first_page=None):
     """Download all blocks from Textract job"""
-    all_blocks = []
-    next_token = None
-    while True:
-        if next_token:
-            resp = textract.get_document_analysis(JobId=job_id, NextToken=next_token)
-        else:
-            resp = textract.get_document_analysis(JobId=job_id)
-        all_blocks.extend(resp['Blocks'])
-        next_token = resp.get('NextToken')
-        if not next_token:
-            break
-    return all_blocks
+    return list(iter_textract_blocks(job_id, first_page))
 
 def linearize_textract_blocks(blocks):
-    """Convert Textract blocks to plain text"""
-    lines = [b['Text'] for b in blocks if b['BlockType'] == 'LINE']
-    return "\n".join(lines)
+    """Convert Textract blocks (any iterable) to plain text, pages separated by PAGE_BREAK"""
+    return linearize_blocks(blocks)
 
 # --------------------------------------------------
 # BEDROCK/CLAUDE PROCESSING FUNCTIONS
 # --------------------------------------------------
-def process_extraction_with_claude(text: str) -> dict:
-    """Process extraction PDF text with Claude (from testingAWS.py logic)"""
-    prompt = f"""
+# Static instructions are sent as their own content block ahead of the OCR
+# text so Bedrock can cache the prefix across accounts (see invoke_claude).
+EXTRACTION_RULES = """
     You are an expert in loan-file indexing.  
     The following text is raw OCR from a PDF that may contain multiple accounts, multiple signers, and supporting documents.
 
@@ -142,7 +311,7 @@ def process_extraction_with_claude(text: str) -> dict:
     - Aadhaar             – primary account holder's Aadhaar  
     - DOB                 – dd-mm-yyyy or yyyy-mm-dd  
     - CustomerID          – omit if absent  
-    - Documents           – array of {{"DocumentType":"<type>","PageNumber":<int>}}  
+    - Documents           – array of {"DocumentType":"<type>","PageNumber":<int>}  
     - Stampdate           – any date string found on the page; omit if none  
     - Document Types  – array of strings (e.g., "Loan Agreement", "KYC", "Statement", "Form 16", "ITR", "Bank Statement", "Salary Slip", "EMI Receipt", "Lien Letter", "NOC", "Foreclosure Letter", "Property Document",'Marriage Certificate', 'Driver License' etc. give with page numbers)
 
@@ -169,14 +338,9 @@ def process_extraction_with_claude(text: str) -> dict:
     - Page numbers are 1-based integers.
 
     OCR text:
-    {text}
     """
-    
-    return invoke_claude(prompt)
 
-def process_attachment_with_claude(text: str) -> list:
-    """Process attachment PDF text with Claude (from classifyAttachment.py logic)"""
-    prompt = f"""
+ATTACHMENT_RULES = """
 You are an document classification analyst.
 Examine **every page** of the text below, identify each distinct document, and return a **single JSON array** with one object per *unique* document.
 
@@ -189,63 +353,65 @@ Rules
 Example
 ```json
 [
-  {{
+  {
     "documentType": "drivers-license",
     "state": "CA",
     "licenseNumber": "DL12345678",
     "lastName": "DOE",
     "firstName": "JANE",
     "dateOfBirth": "1988-04-12"
-  }},
-  {{
+  },
+  {
     "documentType": "marriage-certificate",
     "county": "Clark County, NV",
     "dateOfMarriage": "2015-06-20",
     "spouse1FullName": "JANE DOE",
     "spouse2FullName": "JOHN DOE"
-  }}
+  }
 ]
 ```
 
-{text}
 """
-    
-    return invoke_claude(prompt, is_attachment=True)
-
-def invoke_claude(prompt: str, is_attachment: bool = False):
-    """Invoke Claude via Bedrock"""
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 4000,
-        "temperature": 0,
-        "messages": [{"role": "user", "content": prompt}]
-    })
-
-    resp = bedrock.invoke_model(
+
+def process_extraction_with_claude(text: str) -> dict:
+    """Process extraction PDF text with Claude (from testingAWS.py logic)"""
+    return invoke_claude(EXTRACTION_RULES, text)
+
+def process_attachment_with_claude(text: str) -> list:
+    """Process attachment PDF text with Claude (from classifyAttachment.py logic)"""
+    return invoke_claude(ATTACHMENT_RULES, text, is_attachment=True)
+
+def invoke_claude(instructions: str, text: str, is_attachment: bool = False):
+    """Invoke Claude via Bedrock with *instructions* followed by the OCR *text*"""
+    body = claude_request_body(instructions, text, prompt_caching=BEDROCK_PROMPT_CACHING)
+
+    # Stream the reply so text is consumed as Claude generates it rather than
+    # buffering one large response body at the end
+    resp = bedrock.invoke_model_with_response_stream(
         modelId=BEDROCK_MODEL,
         contentType="application/json",
         accept="application/json",
         body=body
     )
 
-    raw_bytes = resp["body"].read()
-    resp_obj = json.loads(raw_bytes)
-    model_text = resp_obj["content"][0]["text"]
+    model_text = collect_stream_text(resp)
 
-    print("---- RAW CLAUDE TEXT START ----")
-    print(model_text)
-    print("---- RAW CLAUDE TEXT END ----")
+    logger.debug("Raw Claude text: %s", model_text)
 
-    # Clean up the response
-    clean = re.sub(r'^```(?:json)?', '', model_text, flags=re.IGNORECASE)
-    clean = re.sub(r'```$', '', clean)
-    clean = clean.strip()
+    # Clean up the response - strip ```json / ``` fences (fixed strings, no regex needed)
+    clean = model_text.strip()
+    lowered = clean[:7].lower()
+    if lowered.startswith('```json'):
+        clean = clean[7:]
+    elif lowered.startswith('```'):
+        clean = clean[3:]
+    clean = clean.removesuffix('```').strip()
 
     try:
-        data = json.loads(clean)
+        data = json_loads(clean)
         return data
     except json.JSONDecodeError as e:
-        print("Invalid JSON:", clean)
+        logger.error(f"Invalid JSON: {clean}")
         raise
 
 # --------------------------------------------------
@@ -253,84 +419,120 @@ def invoke_claude(prompt: str, is_attachment: bool = False):
 # --------------------------------------------------
 def upload_pdfs_to_s3():
     """Step 1: Upload split PDFs to S3 (from uploadToS3.py logic)"""
-    print("=== STEP 1: Uploading PDFs to S3 ===")
+    logger.info("=== STEP 1: Uploading PDFs to S3 ===")
     
     if not PDF_FILE.exists():
         raise SystemExit("PDF file not found")
 
+    # Skip splitting/uploading entirely if this exact PDF was processed before
+    digest = hashlib.sha256()
+    with PDF_FILE.open('rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    pdf_hash = digest.hexdigest()
+    manifest = load_manifest()
+    if pdf_hash in manifest:
+        logger.info(f"PDF unchanged (sha256 {pdf_hash[:12]}…) - reusing uploads from {MANIFEST_KEY}")
+        return manifest[pdf_hash]
+
     plan = build_account_json(PDF_FILE)
-    print("JSON received:", plan)
+    logger.info(f"JSON received: {plan}")
 
-    src_pdf = pdfium.PdfDocument(PDF_FILE.read_bytes())
     uploaded_files = {}
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-        for account, ranges in plan.items():
-            uploaded_files[account] = {}
-            
-            extraction_pages = parse_range(ranges.get("extraction", ""))
-            attachment_pages = parse_range(ranges.get("attachments", ""))
-
-            if extraction_pages:
-                ext_pdf = tmpdir / f"{account}_extraction.pdf"
-                build_pdf(src_pdf, extraction_pages, ext_pdf)
-                s3_key = f"{S3_PREFIX}/{account}/{account}_extraction.pdf"
-                upload_file(ext_pdf, S3_BUCKET, s3_key)
-                uploaded_files[account]['extraction'] = s3_key
-
-            if attachment_pages:
-                att_pdf = tmpdir / f"{account}_attachments.pdf"
-                build_pdf(src_pdf, attachment_pages, att_pdf)
-                s3_key = f"{S3_PREFIX}/{account}/{account}_attachments.pdf"
-                upload_file(att_pdf, S3_BUCKET, s3_key)
-                uploaded_files[account]['attachments'] = s3_key
-
-    print("All uploads finished.")
+    build_jobs = []                           # (extraction_pages, attachment_pages, s3_key)
+
+    # One PDF per account (extraction pages first) so each account needs a
+    # single Textract job; split_index says where the attachments start
+    for account, ranges in plan.items():
+        extraction_pages = parse_range(ranges.get("extraction", ""))
+        attachment_pages = parse_range(ranges.get("attachments", ""))
+        if not extraction_pages and not attachment_pages:
+            continue
+
+        s3_key = f"{S3_PREFIX}/{account}/{account}_combined.pdf"
+        build_jobs.append((extraction_pages, attachment_pages, s3_key))
+        uploaded_files[account] = {
+            'combined': s3_key,
+            'split_index': len(set(extraction_pages)),
+        }
+
+    # Split across CPU cores and start each upload as soon as its PDF is built;
+    # the PDFs stay in memory and never touch disk
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as build_pool, \
+            ThreadPoolExecutor(max_workers=MAX_UPLOAD_WORKERS) as upload_pool:
+        builds = {
+            build_pool.submit(_build_combined_pdf_job, str(PDF_FILE), ext, att): s3_key
+            for ext, att, s3_key in build_jobs
+        }
+        uploads = [
+            upload_pool.submit(upload_file, build.result(), S3_BUCKET, builds[build])
+            for build in as_completed(builds)
+        ]
+        for upload in as_completed(uploads):
+            upload.result()
+
+    manifest[pdf_hash] = uploaded_files
+    s3.put_object(Bucket=S3_BUCKET, Key=MANIFEST_KEY, Body=json_dumps_bytes(manifest),
+                  ContentType='application/json')
+
+    logger.info("All uploads finished.")
     return uploaded_files
 
 def process_account_pdfs(uploaded_files):
     """Step 2: Process each account's PDFs with Textract and Claude"""
-    print("=== STEP 2: Processing Account PDFs ===")
+    logger.info("=== STEP 2: Processing Account PDFs ===")
     
-    for account, files in uploaded_files.items():
-        print(f"\n--- Processing Account: {account} ---")
-        
-        # Process extraction PDF
-        if 'extraction' in files:
-            print(f"Processing extraction PDF for {account}")
-            process_single_pdf(account, files['extraction'], 'extraction')
+    # Every account is an independent Textract job + Claude calls, so the wall
+    # time is almost all waiting - run them side by side instead of one at a time
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_JOBS) as executor:
+        futures = []
+        for account, files in uploaded_files.items():
+            logger.info(f"Queued PDF for {account}")
+            futures.append(executor.submit(process_account_pdf, account, files))
         
-        # Process attachment PDF  
-        if 'attachments' in files:
-            print(f"Processing attachment PDF for {account}")
-            process_single_pdf(account, files['attachments'], 'attachments')
-
-def process_single_pdf(account, s3_key, pdf_type):
-    """Process a single PDF through Textract and Claude"""
-    print(f"  Starting Textract for {s3_key}")
+        for future in as_completed(futures):
+            future.result()
+
+def process_account_pdf(account, files):
+    """Run one Textract job over an account's combined PDF and process each part"""
+    s3_key = files['combined']
+    split_index = files['split_index']
+    logger.info(f"Starting Textract for {s3_key}")
     
     # Start Textract job
     job_id = start_textract_job(s3_key)
     if not job_id:
-        print(f"  Failed to start Textract for {s3_key}")
+        logger.error(f"Failed to start Textract for {s3_key}")
         return
     
     # Wait for completion
     result = wait_for_textract_job(job_id)
     if not result:
-        print(f"  Textract failed for {s3_key}")
+        logger.error(f"Textract failed for {s3_key}")
         return
     
-    # Download all blocks
-    blocks = download_all_textract_blocks(job_id)
+    # Pages 1..split_index are the extraction pages, the rest are attachments.
+    # Without the raw dump only LINE blocks are kept while paging.
+    parts = {'extraction': [], 'attachments': []}
+    for block in iter_textract_blocks(job_id, first_page=result):
+        if SAVE_RAW_TEXTRACT or block['BlockType'] == 'LINE':
+            pdf_type = 'extraction' if block.get('Page', 1) <= split_index else 'attachments'
+            parts[pdf_type].append(block)
     
+    for pdf_type, blocks in parts.items():
+        if blocks:
+            process_textract_blocks(account, s3_key, pdf_type, blocks)
+
+def process_textract_blocks(account, s3_key, pdf_type, blocks):
+    """Save one part's Textract output and run it through Claude"""
     # Convert to text
     text = linearize_textract_blocks(blocks)
     
-    # Save raw JSON to S3
-    raw_json_key = f"{S3_PREFIX}/{account}/{account}_{pdf_type}_textract_raw.json"
-    save_to_s3({"Blocks": blocks}, raw_json_key, is_json=True)
+    if SAVE_RAW_TEXTRACT:
+        # Save raw JSON to S3
+        raw_json_key = f"{S3_PREFIX}/{account}/{account}_{pdf_type}_textract_raw.json"
+        save_to_s3({"Blocks": blocks}, raw_json_key, is_json=True, compress=True)
     
     # Save plain text to S3
     text_key = f"{S3_PREFIX}/{account}/{account}_{pdf_type}_textract_text.txt"
@@ -347,29 +549,37 @@ def process_single_pdf(account, s3_key, pdf_type):
         structured_key = f"{S3_PREFIX}/{account}/{account}_{pdf_type}_structured.json"
         save_to_s3(structured_data, structured_key, is_json=True)
         
-        print(f"  ✅ Completed processing {s3_key}")
+        logger.info(f"✅ Completed processing {pdf_type} pages of {s3_key}")
         
     except Exception as e:
-        print(f"  ❌ Claude processing failed for {s3_key}: {e}")
-
-def save_to_s3(data, s3_key, is_json=True):
-    """Save data to S3"""
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json' if is_json else '.txt') as tmp_file:
-        if is_json:
-            json.dump(data, tmp_file, indent=2, default=str)
-        else:
-            tmp_file.write(data)
-        tmp_file.flush()
-        
-        upload_file(tmp_file.name, S3_BUCKET, s3_key)
-        Path(tmp_file.name).unlink()  # Clean up temp file
+        logger.error(f"❌ Claude processing failed for {pdf_type} pages of {s3_key}: {e}")
+
+def save_to_s3(data, s3_key, is_json=True, compress=False):
+    """Save data to S3; compress=True gzips it and appends .gz to the key"""
+    if is_json:
+        body = json_dumps_bytes(data, indent=not compress)
+        content_type = 'application/json'
+    else:
+        body = data.encode('utf-8')
+        content_type = 'text/plain'
+
+    extra = {}
+    if compress:
+        body = gzip.compress(body, compresslevel=6)
+        s3_key += '.gz'
+        extra['ContentEncoding'] = 'gzip'
+
+    # Already in memory - PUT it directly instead of round-tripping a temp file
+    s3.put_object(Bucket=S3_BUCKET, Key=s3_key, Body=body, ContentType=content_type, **extra)
+    logger.info(f"Uploaded  ->  s3://{S3_BUCKET}/{s3_key}")
 
 # --------------------------------------------------
 # MAIN EXECUTION
 # --------------------------------------------------
 def main():
-    """Main pipeline execution"""
-    print("🚀 Starting PDF Processing Pipeline")
+    """Main pipeline execution; returns the uploaded files per account"""
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+    logger.info("🚀 Starting PDF Processing Pipeline")
     
     try:
         # Step 1: Upload PDFs to S3
@@ -378,10 +588,11 @@ def main():
         # Step 2: Process each account's PDFs
         process_account_pdfs(uploaded_files)
         
-        print("\n🎉 Pipeline completed successfully!")
+        logger.info("🎉 Pipeline completed successfully!")
+        return uploaded_files
         
     except Exception as e:
-        print(f"\n❌ Pipeline failed: {e}")
+        logger.error(f"❌ Pipeline failed: {e}")
         raise
 
 if __name__ == "__main__":
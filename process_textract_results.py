@@ -6,8 +6,11 @@ Processes all .txt files from S3 using existing Claude functions from testingAWS
 """
 
 import boto3
+from botocore.config import Config
+from aws_config import MAX_FILE_WORKERS, SHARED_CONFIG
 import json
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Import Claude processing functions from existing files
@@ -17,14 +20,29 @@ from classifyAttachment import claude_json as process_attachment_text
 # Configuration
 S3_BUCKET = "awsidpdocs"
 S3_PREFIX = "SplittedPdfs"
+MAX_WORKERS = MAX_FILE_WORKERS  # files processed concurrently (each is an S3 GET + Claude call)
 
-s3 = boto3.client("s3")
+s3 = boto3.client("s3", config=SHARED_CONFIG.merge(Config(max_pool_connections=MAX_WORKERS)))
 
-def get_txt_files():
-    """Get all .txt files from S3"""
+def get_txt_files(accounts=None):
+    """Get all .txt files from S3, optionally only for the given accounts"""
+    if accounts is None:
+        # One paginated listing of the whole prefix
+        return _list_txt_files(f"{S3_PREFIX}/")
+    
+    # Known accounts: list just their folders, side by side
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        per_account = executor.map(_get_account_txt_files, accounts)
+        return [key for keys in per_account for key in keys]
+
+def _get_account_txt_files(account):
+    """List the .txt files under one account's folder"""
+    return _list_txt_files(f"{S3_PREFIX}/{account}/")
+
+def _list_txt_files(prefix):
     paginator = s3.get_paginator('list_objects_v2')
-    return [obj['Key'] for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=S3_PREFIX) 
-            if 'Contents' in page for obj in page['Contents'] 
+    return [obj['Key'] for page in paginator.paginate(Bucket=S3_BUCKET, Prefix=prefix)
+            for obj in page.get('Contents', [])
             if obj['Key'].endswith('_textract_text.txt')]
 
 def parse_filename(s3_key):
@@ -72,17 +90,24 @@ def process_file(s3_key):
     upload_json(result, output_key)
     print(f"✅ Completed {account} - {pdf_type}")
 
-def main():
-    """Main execution"""
+def _safe_process_file(s3_key):
+    """Run process_file, returning the exception instead of raising it"""
+    try:
+        process_file(s3_key)
+    except Exception as e:
+        return e
+    return None
+
+def main(accounts=None):
+    """Main execution; *accounts* (e.g. the keys of pipeline.main()'s result) limits the S3 listing"""
     print("🚀 Processing Textract Results")
-    txt_files = get_txt_files()
+    txt_files = get_txt_files(accounts)
     print(f"Found {len(txt_files)} files")
     
-    for txt_file in txt_files:
-        try:
-            process_file(txt_file)
-        except Exception as e:
-            print(f"❌ Failed {txt_file}: {e}")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for txt_file, error in zip(txt_files, executor.map(_safe_process_file, txt_files)):
+            if error:
+                print(f"❌ Failed {txt_file}: {error}")
     
     print("🎉 Processing completed!")
     
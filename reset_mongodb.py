@@ -5,30 +5,55 @@ reset_mongodb.py
 Reset MongoDB collections to start fresh with new structure
 """
 
+from pymongo.errors import OperationFailure
 from mongodb_rag_indexer import MongoDBRAGIndexer, MONGODB_CONFIG
 
-def reset_collections():
-    """Drop all collections and recreate them"""
+UNAUTHORIZED = 13  # MongoDB error code when the user lacks the dropDatabase privilege
+
+def reset_collections(confirm=True):
+    """Drop the whole database (all collections) in a single command
+
+    Users without the dropDatabase privilege fall back to dropping each
+    configured collection.
+    """
+    database_name = MONGODB_CONFIG['database_name']
+    if confirm:
+        answer = input(f"⚠️ This will drop the '{database_name}' database. Continue? [y/N] ")
+        if answer.strip().lower() not in ('y', 'yes'):
+            print("❌ Reset cancelled")
+            return
+    
     indexer = MongoDBRAGIndexer.__new__(MongoDBRAGIndexer)
     indexer.config = MONGODB_CONFIG
+    indexer.client = None
     indexer.connect_mongodb()
     
     if indexer.db is None:
         print("❌ Could not connect to MongoDB")
         return
     
-    collections = MONGODB_CONFIG['collections']
-    
-    # Drop existing collections
-    for collection_name in collections.values():
-        try:
-            indexer.db[collection_name].drop()
-            print(f"🗑️ Dropped collection: {collection_name}")
-        except Exception as e:
-            print(f"⚠️ Could not drop {collection_name}: {e}")
+    # One round-trip instead of one drop per collection
+    try:
+        indexer.db.command('dropDatabase')
+        print(f"🗑️ Dropped database: {database_name}")
+    except OperationFailure as e:
+        if e.code != UNAUTHORIZED:
+            print(f"⚠️ Could not drop {database_name}: {e}")
+            return
+        print(f"⚠️ Not allowed to drop {database_name}, dropping collections instead")
+        for collection_name in MONGODB_CONFIG['collections'].values():
+            try:
+                indexer.db[collection_name].drop()
+                print(f"🗑️ Dropped collection: {collection_name}")
+            except Exception as e:
+                print(f"⚠️ Could not drop {collection_name}: {e}")
+    except Exception as e:
+        print(f"⚠️ Could not drop {database_name}: {e}")
+        return
     
     print("✅ Collections reset complete")
     print("Run: python mongodb_rag_indexer.py index")
 
 if __name__ == "__main__":
-    reset_collections()
\ No newline at end of file
+    import sys
+    reset_collections(confirm='--yes' not in sys.argv)
\ No newline at end of file
@@ -11,32 +11,60 @@ from tkinter import ttk, scrolledtext, messagebox
 import json
 from datetime import datetime
 import threading
+import queue
+import time
+from functools import lru_cache
 
 # Import MongoDB indexer
 try:
-    from mongodb_rag_indexer import MongoDBRAGIndexer, MONGODB_CONFIG
+    from mongodb_rag_indexer import get_indexer
     MONGODB_AVAILABLE = True
 except ImportError:
     MONGODB_AVAILABLE = False
 
+RESULT_CACHE_SIZE = 128
+RESULT_CACHE_TTL = 60      # seconds
+UI_POLL_MS = 50            # how often worker results are drained into the UI
+
+@lru_cache(maxsize=256)
+def _cached_embed(indexer, query):
+    """Query embeddings only depend on the text, so repeat searches skip the model"""
+    return indexer.embed_query(query)
+
 class DocumentSearchUI:
+    # (result key, label, formatter) shown for each search result
+    _FIELDS = (
+        ('account_number', 'Account Number', str),
+        ('pdf_type', 'PDF Type', str),
+        ('document_type', 'Document Type', str),
+        ('s3_key', 'S3 Key', str),
+        ('similarity_score', 'Similarity Score', lambda v: f"{v:.4f}"),
+    )
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Document Search Interface")
         self.root.geometry("1000x700")
         
+        # (query, filters, search_type) -> (timestamp, results)
+        self._result_cache = {}
+        
         # Initialize MongoDB indexer
         self.indexer = None
         if MONGODB_AVAILABLE:
             try:
-                self.indexer = MongoDBRAGIndexer(MONGODB_CONFIG)
+                self.indexer = get_indexer()
                 self.connection_status = "✅ Connected to MongoDB"
             except Exception as e:
                 self.connection_status = f"❌ MongoDB Error: {str(e)}"
         else:
             self.connection_status = "❌ MongoDB not available"
         
+        # Worker threads post (callback, args) here; the Tk thread drains it
+        self._ui_queue = queue.Queue()
+        
         self.setup_ui()
+        self.root.after(UI_POLL_MS, self._drain_ui_queue)
     
     def setup_ui(self):
         """Setup the user interface"""
@@ -150,6 +178,7 @@ class DocumentSearchUI:
         self.key2_combo.set("")
         self.value2_entry.delete(0, tk.END)
         self.results_text.delete(1.0, tk.END)
+        self._result_cache.clear()
         self.status_var.set("Form cleared")
     
     def get_filters(self):
@@ -176,33 +205,75 @@ class DocumentSearchUI:
             messagebox.showerror("Error", "MongoDB not connected!")
             return
         
+        # Read the form once, on the Tk thread, and hand the values to the worker
+        query = self.query_entry.get().strip()
+        filters = self.get_filters()
+        search_type = self.search_type.get()
+        
         # Disable search button during search
         self.search_button.config(state='disabled')
         self.status_var.set("Searching...")
         
+        cache_key = (query, tuple(sorted(filters.items())), search_type)
+        cached = self._result_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < RESULT_CACHE_TTL:
+            self._update_results(cached[1], query, filters, search_type)
+            return
+        
         # Run search in separate thread to prevent UI freezing
-        search_thread = threading.Thread(target=self._search_worker)
+        search_thread = threading.Thread(target=self._search_worker,
+                                         args=(query, filters, search_type, cache_key))
         search_thread.daemon = True
         search_thread.start()
     
-    def _search_worker(self):
+    def _search_worker(self, query, filters, search_type, cache_key):
         """Worker method for search (runs in separate thread)"""
         try:
-            query = self.query_entry.get().strip()
-            filters = self.get_filters()
-            search_type = self.search_type.get()
-            
             # Perform search
             if search_type == "semantic":
-                results = self.indexer.semantic_search(query, limit=20)
+                results = self.indexer.find_by_unique_filters(filters, limit=20)
+                if results is not None:
+                    search_type = "semantic (fast path)"
+                elif self.indexer.embedding_model:
+                    normalized = " ".join(query.lower().split())
+                    embedding = _cached_embed(self.indexer, normalized)
+                    results = self.indexer.semantic_search_with_embedding(embedding, limit=20)
+                else:
+                    results = self.indexer.semantic_search(query, limit=20)
             else:
                 results = self.indexer.search_documents(query, filters, limit=20)
             
-            # Update UI in main thread
-            self.root.after(0, self._update_results, results, query, filters, search_type)
+            # Cache and display in main thread (the cache is only touched there)
+            self._post_to_ui(self._cache_results, cache_key, results)
+            self._post_to_ui(self._update_results, results, query, filters, search_type)
             
         except Exception as e:
-            self.root.after(0, self._show_error, str(e))
+            self._post_to_ui(self._show_error, str(e))
+    
+    def _cache_results(self, cache_key, results):
+        """Remember search results for RESULT_CACHE_TTL (runs in main thread)"""
+        if not results:
+            # The indexer returns [] on errors; don't pin that for the TTL
+            return
+        self._result_cache.pop(cache_key, None)
+        if len(self._result_cache) >= RESULT_CACHE_SIZE:
+            self._result_cache.pop(next(iter(self._result_cache)))
+        self._result_cache[cache_key] = (time.monotonic(), results)
+    
+    def _post_to_ui(self, callback, *args):
+        """Queue a UI update from a worker thread"""
+        self._ui_queue.put((callback, args))
+    
+    def _drain_ui_queue(self):
+        """Run all pending UI updates (runs in main thread)"""
+        try:
+            while True:
+                callback, args = self._ui_queue.get_nowait()
+                callback(*args)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(UI_POLL_MS, self._drain_ui_queue)
     
     def _update_results(self, results, query, filters, search_type):
         """Update results in the UI (runs in main thread)"""
@@ -226,16 +297,10 @@ class DocumentSearchUI:
                 output.append("-" * 20)
                 
                 # Display key information
-                if 'account_number' in result:
-                    output.append(f"Account Number: {result['account_number']}")
-                if 'pdf_type' in result:
-                    output.append(f"PDF Type: {result['pdf_type']}")
-                if 'document_type' in result:
-                    output.append(f"Document Type: {result['document_type']}")
-                if 's3_key' in result:
-                    output.append(f"S3 Key: {result['s3_key']}")
-                if 'similarity_score' in result:
-                    output.append(f"Similarity Score: {result['similarity_score']:.4f}")
+                for key, label, fmt in self._FIELDS:
+                    value = result.get(key)
+                    if value is not None:
+                        output.append(f"{label}: {fmt(value)}")
                 
                 # Display metadata if available
                 if 'metadata' in result and result['metadata']:
@@ -291,44 +356,58 @@ class DocumentSearchUI:
         if not account_number:
             return
         
+        self.status_var.set("Getting account summary...")
+        
+        # Fetch in a separate thread so the aggregation doesn't freeze the UI
+        summary_thread = threading.Thread(target=self._summary_worker, args=(account_number,))
+        summary_thread.daemon = True
+        summary_thread.start()
+    
+    def _summary_worker(self, account_number):
+        """Worker method for account summary (runs in separate thread)"""
         try:
-            self.status_var.set("Getting account summary...")
             summary = self.indexer.get_account_summary(account_number)
-            
-            # Clear and display summary
-            self.results_text.delete(1.0, tk.END)
-            
-            output = []
-            output.append(f"Account Summary for: {account_number}")
-            output.append("=" * 60)
-            
-            if summary.get('account_info'):
-                account_info = summary['account_info']
-                output.append("ACCOUNT INFORMATION:")
-                output.append("-" * 30)
-                for key, value in account_info.items():
-                    if key != '_id' and value:
-                        output.append(f"{key}: {value}")
-                output.append("")
-            
-            if summary.get('documents'):
-                output.append(f"DOCUMENTS ({len(summary['documents'])}):")
-                output.append("-" * 30)
-                for i, doc in enumerate(summary['documents'], 1):
-                    output.append(f"{i}. {doc.get('pdf_type', 'Unknown')} - {doc.get('document_type', 'Unknown')}")
-                    output.append(f"   S3 Key: {doc.get('s3_key', 'Unknown')}")
-                    if doc.get('created_at'):
-                        output.append(f"   Created: {doc['created_at']}")
-                    output.append("")
-            else:
-                output.append("No documents found for this account.")
-            
-            self.results_text.insert(tk.END, "\n".join(output))
-            self.status_var.set(f"Account summary loaded for {account_number}")
-            
+            self._post_to_ui(self._show_account_summary, account_number, summary)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to get account summary:\n{str(e)}")
-            self.status_var.set("Account summary failed")
+            self._post_to_ui(self._show_summary_error, str(e))
+    
+    def _show_account_summary(self, account_number, summary):
+        """Display account summary (runs in main thread)"""
+        # Clear and display summary
+        self.results_text.delete(1.0, tk.END)
+        
+        output = []
+        output.append(f"Account Summary for: {account_number}")
+        output.append("=" * 60)
+        
+        if summary.get('account_info'):
+            account_info = summary['account_info']
+            output.append("ACCOUNT INFORMATION:")
+            output.append("-" * 30)
+            for key, value in account_info.items():
+                if key != '_id' and value:
+                    output.append(f"{key}: {value}")
+            output.append("")
+        
+        if summary.get('documents'):
+            output.append(f"DOCUMENTS ({len(summary['documents'])}):")
+            output.append("-" * 30)
+            for i, doc in enumerate(summary['documents'], 1):
+                output.append(f"{i}. {doc.get('pdf_type', 'Unknown')} - {doc.get('document_type', 'Unknown')}")
+                output.append(f"   S3 Key: {doc.get('s3_key', 'Unknown')}")
+                if doc.get('created_at'):
+                    output.append(f"   Created: {doc['created_at']}")
+                output.append("")
+        else:
+            output.append("No documents found for this account.")
+        
+        self.results_text.insert(tk.END, "\n".join(output))
+        self.status_var.set(f"Account summary loaded for {account_number}")
+    
+    def _show_summary_error(self, error_message):
+        """Show account summary error (runs in main thread)"""
+        messagebox.showerror("Error", f"Failed to get account summary:\n{error_message}")
+        self.status_var.set("Account summary failed")
 
 def main():
     """Main function to run the UI"""
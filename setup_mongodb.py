@@ -32,11 +32,11 @@ def test_mongodb_connection():
     print("🔗 Testing MongoDB connection...")
     
     try:
-        from mongodb_rag_indexer import MongoDBRAGIndexer, MONGODB_CONFIG
+        from mongodb_rag_indexer import get_indexer
         
-        indexer = MongoDBRAGIndexer(MONGODB_CONFIG)
+        indexer = get_indexer()
         
-        if indexer.db:
+        if indexer.db is not None:
             print("✅ MongoDB connection successful")
             
             # Test basic operations
@@ -57,9 +57,10 @@ def run_initial_indexing():
     print("🚀 Running initial indexing...")
     
     try:
-        from mongodb_rag_indexer import MongoDBRAGIndexer, MONGODB_CONFIG
+        from mongodb_rag_indexer import get_indexer
         
-        indexer = MongoDBRAGIndexer(MONGODB_CONFIG)
+        # Reuses the indexer (and its MongoDB connection) from the connection test
+        indexer = get_indexer()
         indexer.index_s3_documents()
         
         print("✅ Initial indexing completed")
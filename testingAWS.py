@@ -1,4 +1,9 @@
 import boto3, json, time, os,re, logging
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+from aws_config import MAX_FILE_WORKERS, SHARED_CONFIG
+from aws_helpers import (PAGE_BREAK, POLL_FACTOR, POLL_MAX, POLL_MIN, claude_request_body, collect_stream_text,
+                         json_dumps_bytes, json_loads, linearize_blocks, prefetch_textract_blocks)
 from botocore.exceptions import ClientError
 
 # ----------------------------
@@ -8,13 +13,26 @@ S3_BUCKET_NAME = 'awsidpdocs'
 S3_KEY         = 'Attachment1.pdf'          # your PDF
 AWS_REGION     =  'us-east-1'
 BEDROCK_MODEL  = 'anthropic.claude-3-sonnet-20240229-v1:0'
+BEDROCK_PROMPT_CACHING = False   # enable for models that support prompt caching on Bedrock
 
 OUTPUT_RAW_JSON   = 'textract_response.json'
 OUTPUT_TEXT       = 'extracted_text.txt'
 OUTPUT_STRUCTURED = 'structured_output3.json'
+SAVE_RAW          = bool(os.environ.get('IDP_SAVE_RAW'))   # also write OUTPUT_RAW_JSON
 
-textract = boto3.client('textract', region_name=AWS_REGION)
-bedrock  = boto3.client('bedrock-runtime', region_name=AWS_REGION)
+MAX_PROMPT_CHARS = 12000    # OCR text per Claude call; longer documents are split
+CLAUDE_WORKERS   = 4        # concurrent invoke_model calls per document
+
+# every process_textract_results worker may run CLAUDE_WORKERS calls at once
+CLIENT_CONFIG = SHARED_CONFIG.merge(Config(max_pool_connections=MAX_FILE_WORKERS * CLAUDE_WORKERS))
+
+logger = logging.getLogger(__name__)
+
+textract = boto3.client('textract', region_name=AWS_REGION, config=CLIENT_CONFIG)
+bedrock  = boto3.client('bedrock-runtime', region_name=AWS_REGION, config=CLIENT_CONFIG)
+
+_FENCE_PREFIX = re.compile(r'^```(?:json)?', re.IGNORECASE)
+_FENCE_SUFFIX = re.compile(r'```$')
 
 # ----------------------------
 # 1. Kick off Textract (FORMS + TABLES)
@@ -38,6 +56,7 @@ def start_textract_job():
 # 2. Poll until complete
 # ----------------------------
 def wait_for_job(job_id):
+    delay = POLL_MIN
     while True:
         resp = textract.get_document_analysis(JobId=job_id)
         status = resp['JobStatus']
@@ -45,34 +64,31 @@ def wait_for_job(job_id):
             print("✅ Job", status)
             return resp if status == 'SUCCEEDED' else None
         print("⏳ Waiting …")
-        time.sleep(5)
+        time.sleep(delay)
+        delay = min(delay * POLL_FACTOR, POLL_MAX)
 
 # ----------------------------
 # 3. Download *all* pages
 # ----------------------------
-def download_all_blocks(job_id):
-    all_blocks = []
-    next_token = None
-    while True:
-        if next_token:
-            resp = textract.get_document_analysis(JobId=job_id, NextToken=next_token)
-        else:
-            resp = textract.get_document_analysis(JobId=job_id)
-        all_blocks.extend(resp['Blocks'])
-        next_token = resp.get('NextToken')
-        if not next_token:
-            break
-    return all_blocks
+def iter_blocks(job_id, first=None):
+    # yields each page of blocks while the next page is already being fetched;
+    # *first* is wait_for_job's SUCCEEDED response (saves re-fetching page one)
+    return prefetch_textract_blocks(textract, job_id, first)
+
+def download_all_blocks(job_id, first=None):
+    return list(iter_blocks(job_id, first))
 
 # ----------------------------
 # 4. Helpers
 # ----------------------------
 def linearize(blocks):
-    lines = [b['Text'] for b in blocks if b['BlockType'] == 'LINE']
-    return "\n".join(lines)
+    # accepts any iterable of blocks (e.g. iter_blocks) without building a list first;
+    # pages are separated by PAGE_BREAK so split_text can cut between them
+    return linearize_blocks(blocks)
 
-def ask_claude(text: str) -> dict:
-    prompt = f"""
+# static prompt, sent as a system block so Bedrock can cache it between
+# documents; keep it byte-identical across calls
+INSTRUCTIONS = """
     You are an expert in loan-file indexing.  
     The following text is raw OCR from a PDF that may contain multiple accounts, multiple signers, and supporting documents.
 
@@ -121,56 +137,149 @@ def ask_claude(text: str) -> dict:
     - Page numbers are 1-based integers.
 
     OCR text:
-    {text}
-    """
-    body = json.dumps({
-        "anthropic_version": "bedrock-2023-05-31",
-        "max_tokens": 4000,
-        "temperature": 0,
-        "messages": [{"role": "user", "content": prompt}]
-    })
-
-    resp = bedrock.invoke_model(
+"""
+
+def split_text(text: str, max_chars: int = MAX_PROMPT_CHARS):
+    # pack whole pages into each chunk so a form is only cut between pages;
+    # a single page longer than max_chars is split on line boundaries
+    separator = f"\n{PAGE_BREAK}\n"
+    chunks, current, size = [], [], 0
+    for page in text.split(PAGE_BREAK):
+        for piece in _split_lines(page.strip("\n"), max_chars):
+            if current and size + len(piece) + len(separator) > max_chars:
+                chunks.append(separator.join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + len(separator)
+    if current:
+        chunks.append(separator.join(current))
+    return chunks or [text]
+
+def _split_lines(text: str, max_chars: int):
+    # split on line boundaries so no OCR line is cut in half
+    if len(text) <= max_chars:
+        return [text]
+    chunks, current, size = [], [], 0
+    for line in text.splitlines():
+        if current and size + len(line) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def _same_signer(a, b):
+    # same SignerName is the same person unless both chunks saw different SSNs
+    if not (isinstance(a, dict) and isinstance(b, dict)):
+        return False
+    name_a = str(a.get('SignerName', '')).strip().lower()
+    if not name_a or name_a != str(b.get('SignerName', '')).strip().lower():
+        return False
+    ssn_a, ssn_b = a.get('SSN'), b.get('SSN')
+    return not (ssn_a and ssn_b) or ssn_a == ssn_b
+
+def _holder_names(account):
+    names = account.get('Account Holder Names') or []
+    if isinstance(names, str):
+        names = [names]
+    return {str(name).strip().lower() for name in names if name}
+
+def _merge_into(target, account):
+    # fill gaps in *target* from *account* and add signers it hasn't seen
+    for field, value in account.items():
+        if field == 'Signers' and isinstance(value, list):
+            signers = target.setdefault('Signers', [])
+            for signer in value:
+                match = next((s for s in signers if _same_signer(s, signer)), None)
+                if match is None:
+                    signers.append(signer)
+                else:
+                    for key, val in signer.items():
+                        if not match.get(key):
+                            match[key] = val
+        elif not target.get(field):
+            target[field] = value
+
+def merge_accounts(parts):
+    # one object per AccountNumber; later chunks fill gaps and add new signers.
+    # Continuation pages often don't repeat the account number, so objects
+    # without one go to the only account, or to the account sharing a holder name
+    merged, unkeyed = {}, []
+    for part in parts:
+        for account in (part if isinstance(part, list) else [part]):
+            number = account.get('AccountNumber') if isinstance(account, dict) else None
+            if not number:
+                unkeyed.append(account)
+            elif number not in merged:
+                merged[number] = account
+            else:
+                _merge_into(merged[number], account)
+
+    leftover = []
+    for account in unkeyed:
+        target = None
+        if isinstance(account, dict):
+            if len(merged) == 1:
+                target = next(iter(merged.values()))
+            else:
+                names = _holder_names(account)
+                matches = [a for a in merged.values() if names & _holder_names(a)]
+                target = matches[0] if len(matches) == 1 else None
+        if target is None:
+            leftover.append(account)
+        else:
+            _merge_into(target, account)
+    return list(merged.values()) + leftover
+
+def ask_claude(text: str) -> dict:
+    chunks = split_text(text)
+    if len(chunks) == 1:
+        data = _invoke_claude(chunks[0])
+    else:
+        with ThreadPoolExecutor(max_workers=CLAUDE_WORKERS) as pool:
+            data = merge_accounts(pool.map(_invoke_claude, chunks))
+    return data
+
+def _invoke_claude(text: str):
+    # INSTRUCTIONS go in the (cacheable) system block; the user turn is only the OCR text
+    body = claude_request_body(INSTRUCTIONS, text, prompt_caching=BEDROCK_PROMPT_CACHING, system=True)
+
+    resp = bedrock.invoke_model_with_response_stream(
         modelId=BEDROCK_MODEL,
         contentType="application/json",
         accept="application/json",
         body=body
     )
 
-    # --- 1. Read the body stream ---
-    raw_bytes = resp["body"].read()          # <-- make sure we fully consume it
-    resp_obj  = json.loads(raw_bytes)        # <-- Bedrock returns JSON envelope
-    model_text = resp_obj["content"][0]["text"]
+    # --- 1. Collect the text deltas as Claude streams them ---
+    model_text = collect_stream_text(resp)
 
-    # --- 2. Debug print (temporary) ---
-    print("---- RAW CLAUDE TEXT START ----")
-    print(model_text)
-    print("---- RAW CLAUDE TEXT END ----")
+    # --- 2. Raw response (debug logging only) ---
+    logger.debug("RAW CLAUDE TEXT:\n%s", model_text)
 
     # --- 3. Strip markdown fences if they exist ---
     # --- 3b. Grab the first {...} block ---
     # --- 3. Remove markdown fences ---
-    clean = re.sub(r'^```(?:json)?', '', model_text, flags=re.IGNORECASE)
-    clean = re.sub(r'```$', '', clean)
-    clean = clean.strip()
+    clean = _FENCE_SUFFIX.sub('', _FENCE_PREFIX.sub('', model_text)).strip()
 
     # --- 4. Parse whatever JSON Claude returned ---
     try:
-        data = json.loads(clean)      # may be a dict or a list
+        data = json_loads(clean)      # may be a dict or a list
     except json.JSONDecodeError as e:
         print("Invalid JSON:", clean)
         raise
 
-    # --- 5. Save the JSON exactly as Claude produced it ---
-    with open("structured_output.json", "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
     return data
 
 # ----------------------------
 # 5. Main flow
 # ----------------------------
 if __name__ == "__main__":
+    # LOG_LEVEL=DEBUG shows the raw Claude text
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
+
     jid = start_textract_job()
     if not jid:
         exit(1)
@@ -179,15 +288,25 @@ if __name__ == "__main__":
     if not first:
         exit(1)
 
-    blocks = download_all_blocks(jid)
-
-    # --- 5a. Save raw JSON ---
-    with open(OUTPUT_RAW_JSON, 'w', encoding='utf-8') as f:
-        json.dump({"Blocks": blocks}, f, indent=2, default=str)
-    print(f"📄 Saved raw Textract → {OUTPUT_RAW_JSON}")
+    # --- 5a. Optionally stream raw JSON to disk while collecting LINE text ---
+    if SAVE_RAW:
+        line_blocks = []
+        with open(OUTPUT_RAW_JSON, 'wb') as f:
+            f.write(b'{"Blocks": [')
+            for i, block in enumerate(iter_blocks(jid, first)):
+                if i:
+                    f.write(b',')
+                f.write(b'\n  ')
+                f.write(json_dumps_bytes(block, indent=False))
+                if block['BlockType'] == 'LINE':
+                    line_blocks.append(block)
+            f.write(b'\n]}\n')
+        print(f"📄 Saved raw Textract → {OUTPUT_RAW_JSON}")
+        text = linearize(line_blocks)
+    else:
+        text = linearize(iter_blocks(jid, first))
 
     # --- 5b. Save plain text ---
-    text = linearize(blocks)
     with open(OUTPUT_TEXT, 'w', encoding='utf-8') as f:
         f.write(text)
     print(f"📄 Saved plain text → {OUTPUT_TEXT} ({len(text)} chars)")
@@ -195,8 +314,8 @@ if __name__ == "__main__":
     # --- 5c. Structured via Bedrock ---
     try:
         structured = ask_claude(text)
-        with open(OUTPUT_STRUCTURED, 'w', encoding='utf-8') as f:
-            json.dump(structured, f, indent=2)
+        with open(OUTPUT_STRUCTURED, 'wb') as f:
+            f.write(json_dumps_bytes(structured))
         print(f"✨ Structured banking data → {OUTPUT_STRUCTURED}")
     except Exception as e:
         print("❌ Bedrock error:", e)
\ No newline at end of file
@@ -6,10 +6,16 @@ Imports pdfBreaker, gets the JSON, splits the PDF, uploads to S3.
 No CLI arguments – just edit the four constants below.
 """
 
-import tempfile
+import io
+import os
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 import pypdfium2 as pdfium
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from aws_config import SHARED_CONFIG
 from pdfBreaker import build_account_json   # <-- reuse previous logic
 
 # --------------------------------------------------
@@ -19,21 +25,29 @@ PDF_FILE   = Path("./combinedPdf.pdf")
 S3_BUCKET  = "awsidpdocs"
 S3_PREFIX  = "SplittedPdfs"        # folder in bucket
 AWS_PROFILE= None            # set string if needed
+UPLOAD_WORKERS = 16          # parallel S3 uploads
+PART_WORKERS   = 10          # parallel multipart parts per upload
+MB = 1024 * 1024
 # --------------------------------------------------
 
 if AWS_PROFILE:
     boto3.setup_default_session(profile_name=AWS_PROFILE)
-s3 = boto3.client("s3")
+# every part of every upload can hold a connection at once
+s3 = boto3.client("s3", config=SHARED_CONFIG.merge(
+    Config(max_pool_connections=UPLOAD_WORKERS * PART_WORKERS)))
+TRANSFER_CFG = TransferConfig(multipart_threshold=8 * MB, multipart_chunksize=8 * MB,
+                              max_concurrency=PART_WORKERS, use_threads=True)
 
 def parse_range(rng: str):
+    # returns a range (no list materialisation); empty for a blank string
     if not rng:
-        return []
+        return range(0)
     parts = rng.split("-")
     if len(parts) == 1:
-        return [int(parts[0])]
-    return list(range(int(parts[0]), int(parts[1]) + 1))
+        return range(int(parts[0]), int(parts[0]) + 1)
+    return range(int(parts[0]), int(parts[1]) + 1)
 
-def build_pdf(pdf_doc, page_nums, output_path):
+def build_pdf(pdf_doc, page_nums, output):
     """Build a new PDF that contains *page_nums* (1-based) from *pdf_doc*."""
     page_nums = sorted(set(page_nums))
     dest_pdf = pdfium.PdfDocument.new()
@@ -41,10 +55,22 @@ def build_pdf(pdf_doc, page_nums, output_path):
     # import_pages wants 0-based indices and the SOURCE document
     dest_pdf.import_pages(pdf_doc, pages=[p - 1 for p in page_nums])
 
-    dest_pdf.save(output_path)
+    dest_pdf.save(output)        # path or writable file-like object
 
-def upload(file_path, bucket, key):
-    s3.upload_file(str(file_path), bucket, key)
+@functools.lru_cache(maxsize=1)
+def get_src_pdf(pdf_path: str):
+    """Open the source PDF once per worker process and reuse it for every split"""
+    return pdfium.PdfDocument(pdf_path)
+
+def build_job(pdf_path, page_nums):
+    """Process-pool worker: return the split PDF as bytes"""
+    buf = io.BytesIO()
+    build_pdf(get_src_pdf(pdf_path), page_nums, buf)
+    return buf.getvalue()
+
+def upload(fileobj, bucket, key):
+    fileobj.seek(0)
+    s3.upload_fileobj(fileobj, bucket, key, Config=TRANSFER_CFG)
     print(f" Uploaded  ->  s3://{bucket}/{key}")
 
 def main():
@@ -54,24 +80,26 @@ def main():
     plan = build_account_json(PDF_FILE)          # <-- call pdfBreaker
     print("JSON received:", plan)
 
-    src_pdf = pdfium.PdfDocument(PDF_FILE.read_bytes())
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-        for account, ranges in plan.items():
-            extraction_pages = parse_range(ranges.get("extraction", ""))
-            attachment_pages = parse_range(ranges.get("attachments", ""))
-
-            ext_pdf = tmpdir / f"{account}_extraction.pdf"
-            att_pdf = tmpdir / f"{account}_attachments.pdf"
-
-            if extraction_pages:
-                build_pdf(src_pdf, extraction_pages, ext_pdf)
-                upload(ext_pdf, S3_BUCKET, f"{S3_PREFIX}/{account}/{account}_extraction.pdf")
-
-            if attachment_pages:
-                build_pdf(src_pdf, attachment_pages, att_pdf)
-                upload(att_pdf, S3_BUCKET, f"{S3_PREFIX}/{account}/{account}_attachments.pdf")
+    jobs = []                                    # (page_nums, s3_key)
+    for account, ranges in plan.items():
+        extraction_pages = parse_range(ranges.get("extraction", ""))
+        attachment_pages = parse_range(ranges.get("attachments", ""))
+        if extraction_pages:
+            jobs.append((extraction_pages, f"{S3_PREFIX}/{account}/{account}_extraction.pdf"))
+        if attachment_pages:
+            jobs.append((attachment_pages, f"{S3_PREFIX}/{account}/{account}_attachments.pdf"))
+
+    # pdfium isn't thread-safe, so PDFs are built in worker processes (each
+    # opens the source once) and uploaded from threads as soon as they're ready
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as build_pool, \
+            ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as upload_pool:
+        builds = {build_pool.submit(build_job, str(PDF_FILE), pages): key for pages, key in jobs}
+        futures = [
+            upload_pool.submit(upload, io.BytesIO(build.result()), S3_BUCKET, builds[build])
+            for build in as_completed(builds)
+        ]
+        for future in as_completed(futures):
+            future.result()
 
     print("All uploads finished.")
 
@@ -3,14 +3,64 @@
 web_search_ui.py
 
 Web UI for searching MongoDB document data with case-insensitive search
+
+Production: gunicorn web_search_ui:app -w 4 -k gthread --threads 8 --bind 0.0.0.0:5002
+Local dev:  python web_search_ui.py  (set FLASK_DEBUG=1 for the reloader/debugger)
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 import json
-from mongodb_rag_indexer import MongoDBRAGIndexer, MONGODB_CONFIG
+import os
+import time
+import hashlib
+import threading
+from mongodb_rag_indexer import get_indexer
+
+# orjson serialises large result lists much faster; fall back to Flask's jsonify
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
-indexer = MongoDBRAGIndexer(MONGODB_CONFIG)
+# The indexer (MongoDB connection + embedding model) is created on first use
+# via get_indexer(), not at import, so gunicorn workers start quickly
+
+MAX_LIMIT = 100         # largest result page a caller can request
+MIN_QUERY_LENGTH = 2   # shorter queries match almost everything
+
+CACHE_TTL = 30      # seconds a search/account response is reused
+CACHE_SIZE = 1024   # max cached responses per worker
+
+_cache = {}         # key -> (timestamp, value); oldest entry evicted first
+_cache_lock = threading.Lock()
+
+def cached(key, compute):
+    """Return a recent value for *key*, or compute and remember it.
+
+    Empty values are not remembered: the indexer returns []/{} on errors, and
+    caching those would hide a recovered MongoDB for CACHE_TTL seconds.
+    """
+    with _cache_lock:
+        hit = _cache.get(key)
+        if hit and time.monotonic() - hit[0] < CACHE_TTL:
+            return hit[1]
+    
+    value = compute()
+    if not value:
+        return value
+    with _cache_lock:
+        _cache.pop(key, None)
+        if len(_cache) >= CACHE_SIZE:
+            _cache.pop(next(iter(_cache)))
+        _cache[key] = (time.monotonic(), value)
+    return value
+
+def json_response(data):
+    """JSON response body, encoded with orjson when available"""
+    if orjson:
+        return Response(orjson.dumps(data, default=str), mimetype='application/json')
+    return jsonify(data)
 
 @app.route('/')
 def index():
@@ -20,40 +70,55 @@ def index():
 @app.route('/api/search', methods=['POST'])
 def api_search():
     """API endpoint for search"""
-    data = request.get_json()
-    query = data.get('query', '').strip()
+    data = request.get_json(silent=True) or {}
+    query = str(data.get('query', '')).strip()
     search_type = data.get('search_type', 'traditional')
-    limit = int(data.get('limit', 10))
+    try:
+        limit = max(1, min(int(data.get('limit', 10)), MAX_LIMIT))
+    except (TypeError, ValueError):
+        limit = 10
     
     if not query:
-        return jsonify({
+        return json_response({
             'success': False,
             'message': 'Please enter a search query',
             'results': [],
             'count': 0
         })
     
+    if len(query) < MIN_QUERY_LENGTH:
+        return json_response({
+            'success': False,
+            'message': f'Search query must be at least {MIN_QUERY_LENGTH} characters',
+            'results': [],
+            'count': 0
+        })
+    
     try:
         print(f"🔍 Search request: '{query}' (type: {search_type})")
         
+        # Hash the query so very long inputs don't bloat the cache keys
+        key = ('search', search_type, limit, hashlib.blake2b(query.encode()).hexdigest()[:16])
         if search_type == 'semantic':
-            results = indexer.semantic_search(query, limit, similarity_threshold=0.2)
+            results = cached(key, lambda: get_indexer().semantic_search(query, limit, similarity_threshold=0.2))
         else:
-            results = indexer.search_documents(query, {}, limit)
+            results = cached(key, lambda: get_indexer().search_documents(query, {}, limit))
         
         print(f"📊 Found {len(results)} results")
         
-        return jsonify({
+        return json_response({
             'success': True,
             'query': query,
             'search_type': search_type,
+            'limit': limit,
+            'max_limit': MAX_LIMIT,
             'results': results,
             'count': len(results)
         })
         
     except Exception as e:
         print(f"❌ Search error: {e}")
-        return jsonify({
+        return json_response({
             'success': False,
             'message': f'Search error: {str(e)}',
             'results': [],
@@ -64,18 +129,19 @@ def api_search():
 def api_account(account_number):
     """API endpoint for account details"""
     try:
-        summary = indexer.get_account_summary(account_number)
-        return jsonify({
+        summary = cached(('account', account_number),
+                         lambda: get_indexer().get_account_summary(account_number))
+        return json_response({
             'success': True,
             'account_number': account_number,
             'data': summary
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             'success': False,
             'message': f'Error fetching account: {str(e)}',
             'data': {}
         })
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5002)
\ No newline at end of file
+    app.run(debug=os.environ.get('FLASK_DEBUG') == '1', threaded=True, host='0.0.0.0', port=5002)
\ No newline at end of file